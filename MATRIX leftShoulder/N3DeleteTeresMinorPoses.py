@@ -1,10 +1,20 @@
+from neferRegistry import registerMuscle
+
+# The axis points the pose systems were built with
+fullData = (
+	('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'), 
+	('y0', 'y45', 'y90', 'y135', 'y170'), 
+	('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
+def getMuscleRegistry(muscleData):
+	return registerMuscle(muscleData['name'], muscleData['numCtrls'], fullData)
+
 def delExTargetConnections(muscleData):
-	for cIndex in range(1, muscleData['numCtrls'] + 1):
-		mc.delete('iControlMidMus_%s%s1_pointConstraint1' % (muscleData['name'], str(cIndex)))
-		# mc.delete('iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleData['name'], str(cIndex)))
+	getMuscleRegistry(muscleData).delete(role='pointConstraint')
+	# getMuscleRegistry(muscleData).delete(role='blendShape')
 
 def deleteUnusedPoses(muscleData):
-	mc.delete('%s_pose_grp' % muscleData['name'])
+	getMuscleRegistry(muscleData).delete(role='poseGrp')
 	
 
 def main():
@@ -37,12 +47,12 @@ if __name__ == "__main__":
 
 
 def delExTargetConnections(muscleData):
-	for cIndex in range(1, muscleData['numCtrls'] + 1):
-		mc.delete('iControlMidMus_%s%s1_pointConstraint1' % (muscleData['name'], str(cIndex)))
-		mc.delete('iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleData['name'], str(cIndex)))
+	registry = getMuscleRegistry(muscleData)
+	registry.deleteEntries(registry.select(role='pointConstraint') +
+		registry.select(role='blendShape'))
 
 def deleteUnusedPoses(muscleData):
-	mc.delete('%s_pose_grp' % muscleData['name'])
+	getMuscleRegistry(muscleData).delete(role='poseGrp')
 	
 
 def main():
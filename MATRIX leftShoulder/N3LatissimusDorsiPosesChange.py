@@ -6,18 +6,19 @@
 
 # Import function module
 import nm
+from neferRegistry import registerMuscle
 
-def drivePoses(muscleData, driverData):
+def drivePoses(muscleData, driverData, fullData):
 	
+	# Tags the existing pose system on the first run. Later runs read the registry.
+	registry = registerMuscle(muscleData['name'], muscleData['numCtrls'], fullData)
+
 	def delExTargetConnections():
-		for cIndex in range(1, muscleData['numCtrls'] + 1):
-			mc.delete('iControlMidMus_%s%s1_pointConstraint1' % (muscleData['name'], str(cIndex)))
-			# mc.delete('iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleData['name'], str(cIndex)))
+		registry.delete(role='pointConstraint')
+		# registry.delete(role='blendShape')
 
 	def deleteUnusedPoses():
-		mc.select('%s_*_y45_grp' % muscleData['name'], r=True)
-		mc.select('%s_*_y135_grp' % muscleData['name'], add=True)
-		mc.delete()
+		registry.delete(role='cellGrp', anyPoints=['y45', 'y135'])
 
 	def connectDriver():
 		# for cIndex in controlIndexList:
@@ -123,14 +124,20 @@ def main():
 		'axis2Pts'		: 	('y0', 'y90', 'y170')
 		}
 	
-	# drivePoses(muscleData1, driverData)
-	drivePoses(muscleData2, driverData)
-	drivePoses(muscleData3, driverData)
-	drivePoses(muscleData4, driverData)
-	drivePoses(muscleData5, driverData)
-	drivePoses(muscleData6, driverData)
-	drivePoses(muscleData7, driverData)
-	drivePoses(muscleData8, driverData)
+	# The axis points the pose system was built with
+	fullData = (
+		('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'), 
+		('y0', 'y45', 'y90', 'y135', 'y170'), 
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+	
+	# drivePoses(muscleData1, driverData, fullData)
+	drivePoses(muscleData2, driverData, fullData)
+	drivePoses(muscleData3, driverData, fullData)
+	drivePoses(muscleData4, driverData, fullData)
+	drivePoses(muscleData5, driverData, fullData)
+	drivePoses(muscleData6, driverData, fullData)
+	drivePoses(muscleData7, driverData, fullData)
+	drivePoses(muscleData8, driverData, fullData)
 
 	print '\r\rScript completed successfully\r\r'
 
@@ -5,6 +5,7 @@
 
 # Import function module
 import nm
+from neferPoseGridDriver import PoseAxisData
 
 
 class AxisData():
@@ -153,6 +154,9 @@ def main():
 
 	# newData = AxisData(twistData, twistList, humerusCurrentTwist)
 
+	# Or without set driven keys (neferPoseGridDriver.py):
+	# newData = PoseAxisData(twistData, twistList, humerusCurrentTwist)
+
 	bbDriver = NDriver3Axes({
 		'driverName'	: 	'N3_muscleDriver6', 
 		'axis1Name'		: 	'N3_humerus_long_data2',						# Existing
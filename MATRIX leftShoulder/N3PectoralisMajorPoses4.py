@@ -7,6 +7,7 @@
 
 # Import function module
 import nm
+from neferRegistry import registerMuscle
 
 def makePoses(muscleName, controlIndexList, driverData, driverData2):
 
@@ -60,9 +61,11 @@ def makePoses(muscleName, controlIndexList, driverData, driverData2):
 
 	
 	def delExTargetConnections():
-		for cIndex in controlIndexList:
-			mc.delete('iControlMidMus_%s%s1_pointConstraint1' % (muscleName, str(cIndex)))
-			mc.delete('iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleName, str(cIndex)))
+		# Tags the pose system, with the poses just added, on the first run
+		registry = registerMuscle(muscleName, max(controlIndexList), (driverData2['axis1Pts'],
+			driverData2['axis2Pts'], driverData2['axis3Pts']))
+		registry.deleteEntries([entry for role in ('pointConstraint', 'blendShape')
+			for entry in registry.select(role=role) if entry.ctrlNum in controlIndexList])
 
 
 	# Connect to driver wFlexes = 0 set
@@ -6,20 +6,19 @@
 
 # Import function module
 import nm
+from neferRegistry import registerMuscle
 
-def drivePoses(muscleData, driverData):
+def drivePoses(muscleData, driverData, fullData):
 	
+	# Tags the existing pose system on the first run. Later runs read the registry.
+	registry = registerMuscle(muscleData['name'], muscleData['numCtrls'], fullData)
+
 	def delExTargetConnections():
-		for cIndex in range(1, muscleData['numCtrls'] + 1):
-			mc.delete('iControlMidMus_%s%s1_pointConstraint1' % (muscleData['name'], str(cIndex)))
-			# mc.delete('iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleData['name'], str(cIndex)))
+		registry.delete(role='pointConstraint')
+		# registry.delete(role='blendShape')
 
 	def deleteUnusedPoses():
-		mc.select('%s_*_y45_grp' % muscleData['name'], r=True)
-		mc.select('%s_*_y135_grp' % muscleData['name'], add=True)
-		mc.select('%s_*_w45_grp' % muscleData['name'], add=True)
-		mc.select('%s_*_wn45_grp' % muscleData['name'], add=True)
-		mc.delete()
+		registry.delete(role='cellGrp', anyPoints=['y45', 'y135', 'w45', 'wn45'])
 
 	def connectDriver():
 		# for cIndex in controlIndexList:
@@ -98,7 +97,13 @@ def main():
 		'axis3Pts'		: 	('w0', 'w90', 'wn90')
 		}
 	
-	drivePoses(muscleData2, driverData)
+	# The axis points the pose system was built with
+	fullData = (
+		('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'), 
+		('y0', 'y45', 'y90', 'y135', 'y170'), 
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
+	drivePoses(muscleData2, driverData, fullData)
 
 	print '\r\rScript completed successfully\r\r'
 
@@ -4,14 +4,18 @@
 
 
 
+from neferRegistry import registerMuscle
+
+# The axis points the pose systems were built with
+fullData = (
+	('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'), 
+	('y0', 'y45', 'y90', 'y135', 'y170'), 
+	('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
 def deleteNefer(muscleName, numCtrls):
-	for cIndex in range(numCtrls):
-		pointConNode = 'iControlMidMus_%s%s1_pointConstraint1' % (muscleName, str(cIndex + 1))
-		if mc.objExists(pointConNode:
-			mc.delete(pointConNode)
-		bShapeNode = 'iControlMidMus_%s%s1_crossSectionREST_blendShape' % (muscleName, str(cIndex + 1))
-		if mc.objExists(bShapeNode):
-			mc.delete(bShapeNode)
+	registry = registerMuscle(muscleName, numCtrls, fullData)
+	registry.deleteEntries(registry.select(role='pointConstraint') +
+		registry.select(role='blendShape'))
 
 
 
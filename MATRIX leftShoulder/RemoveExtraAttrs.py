@@ -2,6 +2,36 @@
 # 
 # 
 # 
+from neferRegistry import getRegistry, existingNames
+
+
+def removeAttrs(targetList, attrList, batchSize=500):
+	'''Delete the attributes in attrList from the targets in targetList. Attributes that are
+	already gone are skipped, so it is safe to run again. Returns {attr: [node]} of what was
+	removed.'''
+	removed = {}
+	mc.undoInfo(openChunk=True)
+	try:
+		existing = set(existingNames(['%s.%s' % (target, attr) for target in targetList
+			for attr in attrList]))
+
+		# The JIGGLE separator is locked
+		for plug in existing:
+			if plug.endswith('.JIGGLE'):
+				mc.setAttr(plug, lock=False)
+
+		for attr in attrList:
+			nodeList = [target for target in targetList if '%s.%s' % (target, attr) in existing]
+			for i in range(0, len(nodeList), batchSize):
+				batch = nodeList[i:i + batchSize]
+				mc.deleteAttr(batch, attribute=attr)
+			if nodeList:
+				removed[attr] = nodeList
+	finally:
+		mc.undoInfo(closeChunk=True)
+	return removed
+
+
 class RemoveAttrs():
 	
 	def __init__(self, muscleName, numCtrls, mDriver):
@@ -9,17 +39,24 @@ class RemoveAttrs():
 		self.numCtrls = numCtrls
 		self.mDriver = mDriver
 		self.attrList = ['JIGGLE', 'jiggle', 'jiggleX', 'jiggleY', 'jiggleZ', 'jiggleImpact', 'jiggleImpactStart', 'jiggleImpactStop', 'cycle', 'rest']
-		self.remove()
+		self.removed = self.remove()
 
-	def remove(self):
+	def targets(self):
+		registry = getRegistry(self.muscleName)
+		entries = registry.select(role='ctrlTarget') if registry else []
+		if entries:
+			return [entry.node for entry in entries]
+
+		targetList = []
 		for dIndex in range(self.numCtrls): 
 			for pointA in self.mDriver['axis1Points']:
 				for pointB in self.mDriver['axis2Points']:
 					for pointC in self.mDriver['axis3Points']:
-						control = '%s_control%s_%s_%s_%s_target' % (self.muscleName, str(dIndex + 1), pointA, pointB, pointC)
-						mc.setAttr('%s.JIGGLE' % control, lock=False)
-						for attr in self.attrList:
-							mc.deleteAttr('%s.%s' % (control, attr))			
+						targetList.append('%s_control%s_%s_%s_%s_target' % (self.muscleName, str(dIndex + 1), pointA, pointB, pointC))
+		return targetList
+
+	def remove(self):
+		return removeAttrs(self.targets(), self.attrList)
 
 
 def main():
@@ -82,10 +119,17 @@ def main():
 		['L_trapeziusS', 4]
 		]
 
-	for muscle in muscleList:
-		muscleName = muscle[0]
-		numCtrls = muscle[1]
-		Cleared = RemoveAttrs(muscleName, numCtrls, mDriver)
+	# One undo for the whole pass
+	mc.undoInfo(openChunk=True)
+	try:
+		for muscle in muscleList:
+			muscleName = muscle[0]
+			numCtrls = muscle[1]
+			Cleared = RemoveAttrs(muscleName, numCtrls, mDriver)
+			numRemoved = sum([len(nodeList) for nodeList in Cleared.removed.values()])
+			print '%s: %s attributes removed' % (muscleName, numRemoved)
+	finally:
+		mc.undoInfo(closeChunk=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,212 @@
+# neferBuildEstimate.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Dry run of a neferMuscle build. Counts what NeferMuscle (or makeMusclePoseSys) would create
+for a list of muscles before the build is started:
+
+	groups, targets, blend shape inputs, point constraint weights, driver connections and
+	an estimate of the scene memory.
+
+Compare the full 150 pose grid against a reduced driver such as N3_muscleDriver3, a
+validity mask (the 'out of range' poses) or cross sections on only some of the controls.
+Does not change the scene. In Maya, muscleData() takes the number of controls of a muscle
+from its registry (neferRegistry.py) when there is one.
+'''
+
+from collections import namedtuple
+
+from neferPoseGrid import cellNames
+
+try:
+	from neferRegistry import getRegistry
+except ImportError:
+	# Outside Maya; the control counts are taken as given
+	getRegistry = None
+
+MuscleData = namedtuple('MuscleData', ['muscleName', 'numCtrls'])
+
+# Rough scene memory per node in bytes. Adjust after profiling a scene. Cross section
+# targets are curves, so they scale with the number of CVs.
+NODE_BYTES = {
+	'group'				: 	1500,
+	'parentConstraint'	: 	3500,
+	'ctrlTarget'		: 	6000,
+	'crossTarget'		: 	2500,
+	'crossTargetCV'		: 	40,
+	'blendShapeInput'	: 	600,
+	'constraintWeight'	: 	400,
+	'connection'		: 	100,
+	'multiply'			: 	1200,
+	'animCurveKey'		: 	150,
+	}
+
+
+class Estimate():
+	'''Counts of the nodes and connections a build creates.'''
+	fields = [
+		'groups', 'parentConstraints', 'ctrlTargets', 'crossTargets', 'blendShapeInputs',
+		'constraintWeights', 'driverConnections', 'driverNodes', 'driverKeys']
+
+	def __init__(self, name):
+		self.name = name
+		for field in self.fields:
+			setattr(self, field, 0)
+		self.crossTargetCVs = 0
+
+	def add(self, other):
+		for field in self.fields:
+			setattr(self, field, getattr(self, field) + getattr(other, field))
+		self.crossTargetCVs += other.crossTargetCVs
+
+	def memory(self):
+		'Estimated scene memory in bytes.'
+		return (
+			self.groups * NODE_BYTES['group'] +
+			self.parentConstraints * NODE_BYTES['parentConstraint'] +
+			self.ctrlTargets * NODE_BYTES['ctrlTarget'] +
+			self.crossTargets * NODE_BYTES['crossTarget'] +
+			self.crossTargetCVs * NODE_BYTES['crossTargetCV'] +
+			self.blendShapeInputs * NODE_BYTES['blendShapeInput'] +
+			self.constraintWeights * NODE_BYTES['constraintWeight'] +
+			self.driverConnections * NODE_BYTES['connection'] +
+			self.driverNodes * NODE_BYTES['multiply'] +
+			self.driverKeys * NODE_BYTES['animCurveKey'])
+
+	def report(self):
+		lines = ['%s' % self.name]
+		for field in self.fields:
+			lines.append('\t%-20s %8d' % (field, getattr(self, field)))
+		lines.append('\t%-20s %8.1f MB' % ('memory', self.memory() / 1048576.0))
+		return '\n'.join(lines)
+
+
+def muscleData(muscleName, numCtrls):
+	'''Return the MuscleData of a muscle. The number of controls is read from the registry
+	of the muscle if it has one, and numCtrls is the fallback.'''
+	registry = getRegistry(muscleName) if getRegistry else None
+	if registry:
+		registered = max([0] + registry.byCtrl.keys())
+		if registered:
+			numCtrls = registered
+	return MuscleData(muscleName, numCtrls)
+
+
+def poseCells(data, validPoses=None):
+	'''Return the pose cells of the axis point lists in data, in build order. validPoses is
+	an optional collection of the poses to keep (the validity mask).'''
+	cells = cellNames(data)
+	if validPoses is not None:
+		validPoses = set(validPoses)
+		cells = [cell for cell in cells if cell in validPoses]
+	return cells
+
+
+def estimateMuscle(muscle, data, validPoses=None, crossRange=None, numCVs=8):
+	'''Count what NeferMuscle creates for one muscle. muscle is a MuscleData or a
+	[muscleName, numCtrls] pair. crossRange is an optional (first, last) range of the controls
+	that get cross section targets; all of them by default.'''
+	muscleName, numCtrls = muscle[0], muscle[1]
+	cells = poseCells(data, validPoses)
+	if crossRange is None:
+		crossRange = (1, numCtrls)
+	numCross = max(0, min(crossRange[1], numCtrls) - crossRange[0] + 1)
+
+	# One pose group for every partial cell that leads to a kept cell
+	partialCells = set()
+	for cell in cells:
+		points = cell.split('_')
+		for i in range(1, len(points) + 1):
+			partialCells.add('_'.join(points[:i]))
+
+	estimate = Estimate(muscleName)
+	estimate.groups = 1 + len(partialCells) + len(cells) * numCtrls
+	estimate.parentConstraints = len(cells) * numCtrls
+	estimate.ctrlTargets = len(cells) * numCtrls
+	estimate.crossTargets = len(cells) * numCross
+	estimate.crossTargetCVs = estimate.crossTargets * numCVs
+	estimate.blendShapeInputs = len(cells) * numCross
+	estimate.constraintWeights = len(cells) * numCtrls
+	estimate.driverConnections = estimate.constraintWeights + estimate.blendShapeInputs
+	return estimate
+
+
+def estimateDriver(driverName, data):
+	'''Count the data group keys and multiply nodes of an N3 driver for the axis point
+	lists in data. Each sample of an axis gets 2 (end points) or 3 keys.'''
+	estimate = Estimate(driverName)
+	for axisPts in data:
+		if len(axisPts) > 1:
+			estimate.driverKeys += 3 * len(axisPts) - 2
+	estimate.driverNodes = len(poseCells(data))
+	estimate.driverConnections = estimate.driverNodes * (len(data) + 1)
+	return estimate
+
+
+def estimateBuild(label, muscleList, data, validPoses=None, crossRange=None, driverName=None):
+	'''Total the estimates for a list of muscles. Adds the driver when driverName is given
+	(for a new driver; existing drivers cost nothing more).'''
+	total = Estimate(label)
+	for muscle in muscleList:
+		total.add(estimateMuscle(muscle, data, validPoses, crossRange))
+	if driverName:
+		total.add(estimateDriver(driverName, data))
+	return total
+
+
+def main():
+
+	muscleList = [
+		muscleData('L_teresMajor', 5),
+		muscleData('L_latissimusDorsi2A', 6),
+		muscleData('L_latissimusDorsi2B', 6),
+		muscleData('L_latissimusDorsi2C', 7),
+		muscleData('L_latissimusDorsi2D', 7),
+		muscleData('L_latissimusDorsi2E', 8),
+		muscleData('L_latissimusDorsi2F', 9),
+		muscleData('L_latissimusDorsi2G', 9),
+		muscleData('L_latissimusDorsi2H', 7)
+		]
+
+	# N3_muscleDriver1
+	fullData = (
+		('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+		('y0', 'y45', 'y90', 'y135', 'y170'),
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
+	# N3_muscleDriver3
+	reducedData = (
+		('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+		('y0', 'y90', 'y170'),
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
+	# Poses that are out of range for the shoulder (see N3poses.py)
+	outOfRange = set([
+		'x0_y45_wn90', 'x0_y90_wn45', 'x0_y90_wn90', 'x0_y135_wn45', 'x0_y135_wn90',
+		'x0_y170_wn45', 'x0_y170_wn90', 'x45_y45_w90', 'x45_y45_wn90', 'x45_y90_w90',
+		'x45_y90_wn90', 'x45_y135_w90', 'x45_y135_wn90', 'x45_y170_w90', 'x45_y170_wn90',
+		'x90_y45_w90', 'x90_y90_w45', 'x90_y90_w90', 'x90_y135_w45', 'x90_y135_w90',
+		'x90_y170_w45', 'x90_y170_w90', 'x135_y90_wn45', 'x135_y90_wn90'])
+	for twist in fullData[2]:
+		outOfRange.add('x135_y135_%s' % twist)
+		outOfRange.add('x135_y170_%s' % twist)
+	validPoses = [pose for pose in poseCells(fullData) if pose not in outOfRange]
+
+	# Swing-twist driver: one latitude 0 pose per twist (PolarPoseGrid)
+	polarPoses = [pose for pose in poseCells(fullData)
+		if pose.split('_')[1] != 'y0' or pose.startswith('x0_')]
+
+	estimates = [
+		estimateBuild('Full grid', muscleList, fullData),
+		estimateBuild('Full grid, valid poses', muscleList, fullData, validPoses),
+		estimateBuild('N3_muscleDriver3', muscleList, reducedData),
+		estimateBuild('Full grid, cross sections 2-4', muscleList, fullData, crossRange=(2, 4)),
+		estimateBuild('Swing-twist', muscleList, fullData, polarPoses)]
+
+	for estimate in estimates:
+		print estimate.report()
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -12,6 +12,8 @@ addPoseVisibilityCtrl.py
 
 
 import pymel.core as pm
+from neferRegistry import getRegistry
+from neferPoseGrid import poseHierarchy
 
 class Driver():
 	"""docstring for Driver"""
@@ -181,6 +183,7 @@ class NeferMuscle():
 		self.numCtrls = numCtrls
 		self.muscleDriver = driverInfo.name
 		self.data = driverInfo.data
+		self.registry = getRegistry(muscleName, create=True)
 		self.getMayaMusInfo()
 		self.setupMayaMus()
 		self.createPoses()
@@ -210,15 +213,18 @@ class NeferMuscle():
 				
 				# Constrain ctrlPoseGrp to Maya Muscle control AUTO to get auto movement
 				ctrlPoseGrp.parentConstraint(self.musCtrls[dIndex].autoGrpName)
+				self.registry.tag(ctrlPoseGrp.name, 'ctrlPoseGrp', dIndex + 1, driverPt)
 				
 				# Create control target
 				ctrlTargetName = '%s_control%s_%s_target' % (self.muscleName, str(dIndex + 1), driverPt)
 				ctrlTarget = MuscleCtrlTarget(ctrlTargetName, self.musCtrls[dIndex], ctrlPoseGrp.name)
+				self.registry.tag(ctrlTarget.name, 'ctrlTarget', dIndex + 1, driverPt)
 				
 				# Create cross section target
 				crossTargetName = '%s_crossSection%s_%s_target' % (self.muscleName, str(dIndex + 1), 
 					driverPt)
 				crossTarget = MuscleCrossTarget(crossTargetName, self.musCross[dIndex], ctrlTarget.name)
+				self.registry.tag(crossTarget.name, 'crossTarget', dIndex + 1, driverPt)
 
 				# Add driver to driver list
 				self.musCtrls[dIndex].addDriver(driverPt)
@@ -227,42 +233,18 @@ class NeferMuscle():
 		# Create the main pose group for the muscle
 		topPoseGrp = 'muscle_pose_grp'		# Already exists in the scene
 		mainPoseGrp = SimpleGrp('%s_pose_grp' % self.muscleName, topPoseGrp)
-
-		# Create the poses within pose groups. Select based on number of axes.
-		for pointA in self.data[0]:
-			poseGrpA = SimpleGrp(
-				mainPoseGrp.name.replace('_pose_grp', '_%s_grp' % pointA), 
-				mainPoseGrp.name)
-			if len(self.data) == 1:
-				poseGrpA.makeInvisible()
-				driverPt = pointA
-				_createCtrlCrossPoses(poseGrpA.name, driverPt)
+		self.registry.tag(mainPoseGrp.name, 'poseGrp')
+
+		# Create the poses within pose groups, one level of groups per axis
+		poseGrps = {'' : mainPoseGrp}
+		for pose, parentPose, leaf in poseHierarchy(self.data):
+			poseGrp = SimpleGrp('%s_%s_grp' % (self.muscleName, pose), poseGrps[parentPose].name)
+			self.registry.tag(poseGrp.name, 'cellGrp', 0, pose)
+			if leaf:
+				poseGrp.makeInvisible()
+				_createCtrlCrossPoses(poseGrp.name, pose)
 			else:
-				for pointB in self.data[1]:
-					poseGrpB = SimpleGrp(
-						poseGrpA.name.replace('_grp', '_%s_grp' % pointB), 
-						poseGrpA.name)
-					if len(self.data) == 2:
-						poseGrpB.makeInvisible()
-						driverPt = '%s_%s' % (pointA, pointB)
-						_createCtrlCrossPoses(poseGrpB.name, driverPt)
-					else:
-						for pointC in self.data[2]:
-							poseGrpC = SimpleGrp(
-								poseGrpB.name.replace('_grp', '_%s_grp' % pointC), 
-								poseGrpB.name)
-							if len(self.data) == 3:
-								poseGrpC.makeInvisible()
-								driverPt = '%s_%s_%s' % (pointA, pointB, pointC)
-								_createCtrlCrossPoses(poseGrpC.name, driverPt)
-							else:
-								for pointD in self.data[3]:
-									poseGrpD = SimpleGrp(
-										poseGrpC.name.replace('_grp', '_%s_grp' % pointD), 
-										poseGrpC.name)
-									poseGrpD.makeInvisible()
-									driverPt = '%s_%s_%s_%s' % (pointA, pointB, pointC, pointD)
-									_createCtrlCrossPoses(poseGrpD.name, driverPt)
+				poseGrps[pose] = poseGrp
 
 	def connectDriver(self):
 		# Connect poses to muscle control and muscle cross sections
@@ -275,6 +257,13 @@ class NeferMuscle():
 			self.musCtrls[index].connectDriver()
 			self.musCross[index].connectDriver()
 
+		# Tag the constraint and blend shape nodes and write the registry
+		for index in range(self.numCtrls):
+			self.registry.tag('%s_pointConstraint1' % self.musCtrls[index].name, 'pointConstraint', 
+				index + 1)
+			self.registry.tag(self.musCross[index].blendShape, 'blendShape', index + 1)
+		self.registry.save()
+
 
 
 def main():
@@ -0,0 +1,251 @@
+# neferMuscleReconnect.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Reconnect the muscle controls and muscle cross sections of a neferMuscle to its driver
+without tearing down the existing connections.
+
+1. Build the list of (target, driver attribute) pairs the muscle should have.
+2. Read the targets and driver connections that are in the scene now.
+3. Add only the missing targets/connections and remove only the wrong ones.
+
+Use after poses are replaced instead of deleting the point constraints and blend shape
+nodes and running neferMuscleConnections.py again.
+'''
+
+import maya.cmds as mc
+from neferPoseGrid import cellNames
+from neferRegistry import lookupName, existingNames
+
+
+class Driver():
+	"""docstring for Driver"""
+	def __init__(self, name, data):
+		self.name = name
+		self.data = data
+
+
+class WiringDiff():
+	'''The edits needed to bring a constraint or blend shape node to its wanted wiring.'''
+	def __init__(self, node):
+		self.node = node
+		self.addTargets = []		# [(target, driverPlug)]
+		self.removeTargets = []		# [target]
+		self.reconnect = []			# [(target, driverPlug)]
+		self.missingTargets = []	# Targets that do not exist in the scene
+
+	def numEdits(self):
+		return len(self.addTargets) + len(self.removeTargets) + len(self.reconnect)
+
+	def report(self):
+		return '%s: %s added, %s removed, %s reconnected, %s missing in scene' % (
+			self.node, len(self.addTargets), len(self.removeTargets), len(self.reconnect),
+			len(self.missingTargets))
+
+
+def _incomingConnections(node, attr=None):
+	'''Return {destination attribute: source plug} for all the incoming connections of node
+	with one listConnections call.'''
+	plug = node if attr is None else '%s.%s' % (node, attr)
+	pairs = mc.listConnections(plug, source=True, destination=False, connections=True,
+		plugs=True) or []
+	incoming = {}
+	for i in range(0, len(pairs), 2):
+		incoming[pairs[i].split('.', 1)[1]] = pairs[i + 1]
+	return incoming
+
+
+def _diffWiring(diff, wanted, current, incoming):
+	'''Fill diff by comparing the wanted [(target, driverPlug)] against the current
+	{target: weight attribute} and the incoming {weight attribute: source plug}.'''
+	wantedTargets = set()
+	existing = set(existingNames([target for target, driverPlug in wanted
+		if target not in current]))
+	for target, driverPlug in wanted:
+		wantedTargets.add(target)
+		if target in current:
+			if incoming.get(current[target]) != driverPlug:
+				diff.reconnect.append((target, driverPlug))
+		elif target in existing:
+			diff.addTargets.append((target, driverPlug))
+		else:
+			diff.missingTargets.append(target)
+
+	for target in current:
+		if target not in wantedTargets:
+			diff.removeTargets.append(target)
+	return diff
+
+
+class ControlWiring():
+	'''The point constraint wiring of a Maya Muscle control.'''
+	def __init__(self, muscleName, cNum, wanted):
+		self.name = 'iControlMidMus_%s%s1' % (muscleName, str(cNum))
+		self.constraint = '%s_pointConstraint1' % self.name
+		self.wanted = wanted
+
+	def currentTargets(self):
+		'Return {target: weight attribute} for the existing point constraint.'
+		if not mc.objExists(self.constraint):
+			return {}
+		targets = mc.pointConstraint(self.constraint, q=True, targetList=True) or []
+		weights = mc.pointConstraint(self.constraint, q=True, weightAliasList=True) or []
+		return dict(zip(targets, weights))
+
+	def diff(self):
+		current = self.currentTargets()
+		incoming = _incomingConnections(self.constraint) if current else {}
+		return _diffWiring(WiringDiff(self.constraint), self.wanted, current, incoming)
+
+	def apply(self, diff):
+		if diff.removeTargets:
+			mc.pointConstraint(diff.removeTargets, self.name, e=True, remove=True)
+		if diff.addTargets:
+			mc.pointConstraint([target for target, driverPlug in diff.addTargets], self.name,
+				weight=0.0)
+		if diff.addTargets or diff.reconnect:
+			current = self.currentTargets()
+			for target, driverPlug in diff.addTargets + diff.reconnect:
+				mc.connectAttr(driverPlug, '%s.%s' % (self.constraint, current[target]),
+					force=True)
+
+
+class CrossSectionWiring():
+	'''The blend shape wiring of a Maya Muscle cross section.'''
+	def __init__(self, muscleName, cNum, wanted):
+		self.name = 'iControlMidMus_%s%s1_crossSectionREST' % (muscleName, str(cNum))
+		self.blendShape = '%s_blendShape' % self.name
+		self.wanted = wanted
+
+	def currentTargets(self):
+		'Return {target: weight attribute} for the existing blend shape node.'
+		if not mc.objExists(self.blendShape):
+			return {}
+		aliases = mc.aliasAttr(self.blendShape, q=True) or []
+		return dict(zip(aliases[0::2], aliases[1::2]))
+
+	def diff(self):
+		current = self.currentTargets()
+		incoming = {}
+		if current:
+			# Connections may be listed by alias or by weight[i]. Key them both ways.
+			aliasOf = dict((weight, alias) for alias, weight in current.items())
+			for attr, source in _incomingConnections(self.blendShape, 'weight').items():
+				incoming[aliasOf.get(attr, attr)] = source
+			current = dict((alias, alias) for alias in current)
+		return _diffWiring(WiringDiff(self.blendShape), self.wanted, current, incoming)
+
+	def _weightIndex(self, weightAttr):
+		return int(weightAttr[weightAttr.index('[') + 1:-1])
+
+	def apply(self, diff):
+		current = self.currentTargets()
+		existing = set(existingNames(diff.removeTargets))
+		for target in diff.removeTargets:
+			index = self._weightIndex(current.pop(target))
+			if target in existing:
+				mc.blendShape(self.blendShape, e=True, rm=True, t=(self.name, index, target, 1.0))
+			else:
+				mc.aliasAttr('%s.%s' % (self.blendShape, target), rm=True)
+				mc.removeMultiInstance('%s.weight[%s]' % (self.blendShape, index), b=True)
+
+		addList = [target for target, driverPlug in diff.addTargets]
+		if addList and not mc.objExists(self.blendShape):
+			mc.blendShape(addList[0], self.name, name=self.blendShape)
+			addList = addList[1:]
+		nextIndex = max([self._weightIndex(w) for w in current.values()] or [0]) + 1
+		for target in addList:
+			mc.blendShape(self.blendShape, e=True, t=(self.name, nextIndex, target, 1.0))
+			nextIndex += 1
+
+		for target, driverPlug in diff.addTargets + diff.reconnect:
+			mc.connectAttr(driverPlug, '%s.%s' % (self.blendShape, target), force=True)
+
+
+class ReconnectMuscle():
+	'''Compare the driver wiring a neferMuscle should have against the scene and make only
+	the edits needed.'''
+	def __init__(self, muscleName, numCtrls, driverInfo, targetSuffix='', crossSections=True):
+		self.muscleName = muscleName
+		self.numCtrls = numCtrls
+		self.driverInfo = driverInfo
+		# Text between the driver point and '_target', e.g. '_w0' when a 2 axis driver
+		# drives the twist 0 poses.
+		self.targetSuffix = targetSuffix
+		self.crossSections = crossSections
+
+	def wanted(self, kind, cNum):
+		role = {'control': 'ctrlTarget', 'crossSection': 'crossTarget'}[kind]
+		wanted = []
+		for driverPt in cellNames(self.driverInfo.data):
+			target = lookupName(self.muscleName, role, cNum, driverPt + self.targetSuffix,
+				'%s_%s%s_%s%s_target' % (self.muscleName, kind, str(cNum), driverPt,
+				self.targetSuffix))
+			wanted.append((target, '%s.%s' % (self.driverInfo.name, driverPt)))
+		return wanted
+
+	def wirings(self):
+		wirings = []
+		for cNum in range(1, self.numCtrls + 1):
+			wirings.append(ControlWiring(self.muscleName, cNum, self.wanted('control', cNum)))
+			if self.crossSections:
+				wirings.append(CrossSectionWiring(self.muscleName, cNum,
+					self.wanted('crossSection', cNum)))
+		return wirings
+
+	def run(self, apply=True):
+		'''Diff every control and cross section of the muscle. Apply the edits unless apply
+		is False. Returns the list of WiringDiff.'''
+		diffs = []
+		mc.undoInfo(openChunk=True)
+		try:
+			for wiring in self.wirings():
+				diff = wiring.diff()
+				if apply and diff.numEdits():
+					wiring.apply(diff)
+				diffs.append(diff)
+		finally:
+			mc.undoInfo(closeChunk=True)
+		return diffs
+
+
+def main():
+
+	muscleListA = [
+		['L_pectoralisA', 6],
+		['L_pectoralisB', 6],
+		['L_pectoralisC', 6],
+		['L_pectoralisD', 6],
+		['L_pectoralisE', 6],
+		['L_pectoralisF', 6],
+		['L_pectoralisG', 6],
+		['L_pectoralisH', 6],
+		['L_pectoralisJ', 6],
+		['L_pectoralisK', 7],
+		['L_pectoralisL', 7],
+		['L_pectoralisM', 7]
+		]
+
+	n3driver = Driver(
+		'N3_muscleDriver1',
+		(('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+		('y0', 'y45', 'y90', 'y135', 'y170'),
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+		)
+
+	# Set to False to only report the edits
+	apply = True
+
+	numEdits = 0
+	for muscle in muscleListA:
+		for diff in ReconnectMuscle(muscle[0], muscle[1], n3driver).run(apply):
+			numEdits += diff.numEdits()
+			if diff.numEdits() or diff.missingTargets:
+				print diff.report()
+
+	print '\r%s edits' % numEdits
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -0,0 +1,156 @@
+# neferPoseEdit.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Batched pose edits. Moving a %s_control%s_%s_target node re-evaluates the point constraint of
+the control and, through the cross section target parented under it, the blend shape node of
+the cross section. A sculpting pass over the pectoralis set moves hundreds of targets, so
+the rig re-evaluates hundreds of times.
+
+A PoseEditSession freezes the pose driven nodes of its muscles (point constraints, blend
+shapes and the sparse blend nodes of neferPoseGridDriver.py) by setting their nodeState to
+blocking. Target edits are queued with setTranslate() and setCVs(), and commit() writes
+them in one undo chunk. The nodes are then unblocked, so the rig re-evaluates once.
+Targets moved by hand during a session are not queued: they are their own undo steps, but
+they are still evaluated only once, when the nodes are unblocked.
+
+	session = PoseEditSession([('L_pectoralisA', 6), ('L_pectoralisB', 6)])
+	session.begin()
+	session.setTranslate('L_pectoralisA_control1_x90_y0_wn45_target', (1.0, 2.0, 0.5))
+	...
+	session.commit()
+
+or as a with block, which commits at the end and cancels if there is an error:
+
+	with PoseEditSession(muscleList) as session:
+		...
+'''
+
+import maya.cmds as mc
+
+from neferRegistry import lookupName, existingNames
+
+BLOCKING = 2
+
+
+def poseDrivenNodes(muscleList):
+	'''Return the nodes of the muscles that evaluate from the pose targets. muscleList is a
+	list of (muscle name, number of controls).'''
+	candidates = []
+	for muscleName, numCtrls in muscleList:
+		for cNum in range(1, numCtrls + 1):
+			control = 'iControlMidMus_%s%s1' % (muscleName, cNum)
+			candidates.append(lookupName(muscleName, 'pointConstraint', cNum, '',
+				'%s_pointConstraint1' % control))
+			candidates.append(lookupName(muscleName, 'blendShape', cNum, '',
+				'%s_crossSectionREST_blendShape' % control))
+			candidates.append('%s_sparseBlend' % control)
+			candidates.append('%s_crossSectionREST_sparseBlend' % control)
+	return existingNames(candidates)
+
+
+class PoseEditSession():
+	'''Freeze the pose driven nodes of the muscles in muscleList, a list of (muscle name,
+	number of controls), while their pose targets are edited.'''
+	def __init__(self, muscleList):
+		self.muscleList = list(muscleList)
+		self.nodeStates = {}		# {node: nodeState before begin}
+		self.translates = {}		# {target: (x, y, z)}
+		self.cvs = {}				# {target curve shape: [(x, y, z), ...]}
+		self.active = False
+
+	def __enter__(self):
+		self.begin()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		if excType is None:
+			self.commit()
+		else:
+			self.cancel()
+		return False
+
+	def _setStates(self, states):
+		# Freezing and unfreezing are not edits, so they are left out of the undo queue
+		undoState = mc.undoInfo(q=True, stateWithoutFlush=True)
+		mc.undoInfo(stateWithoutFlush=False)
+		try:
+			for node, state in states:
+				mc.setAttr('%s.nodeState' % node, state)
+		finally:
+			mc.undoInfo(stateWithoutFlush=undoState)
+
+	def begin(self):
+		'Block the pose driven nodes. Returns the number of nodes frozen.'
+		nodes = poseDrivenNodes(self.muscleList)
+		self.nodeStates = dict((node, mc.getAttr('%s.nodeState' % node)) for node in nodes)
+		self._setStates([(node, BLOCKING) for node in nodes])
+		self.active = True
+		return len(nodes)
+
+	def setTranslate(self, target, value):
+		'Queue the translate of a control target.'
+		self.translates[target] = tuple(value)
+
+	def setCVs(self, target, points):
+		'''Queue the CV positions (object space) of a cross section target. target can be the
+		transform or the curve shape.'''
+		if mc.nodeType(target) == 'transform':
+			target = mc.listRelatives(target, shapes=True, noIntermediate=True, path=True)[0]
+		self.cvs[target] = [tuple(point) for point in points]
+
+	def numEdits(self):
+		return len(self.translates) + len(self.cvs)
+
+	def commit(self):
+		'''Write the queued edits in one undo chunk and unblock the nodes, so the rig
+		re-evaluates once. Each target is one setAttr: its translate, or all its CVs as one
+		controlPoints range. Returns the number of targets written.'''
+		numEdits = self.numEdits()
+		mc.undoInfo(openChunk=True)
+		try:
+			for target, value in self.translates.items():
+				mc.setAttr('%s.translate' % target, *value)
+			for target, points in self.cvs.items():
+				if points:
+					mc.setAttr('%s.controlPoints[0:%s]' % (target, len(points) - 1),
+						*[value for point in points for value in point],
+						size=len(points), type='double3')
+		finally:
+			mc.undoInfo(closeChunk=True)
+			self.end()
+		return numEdits
+
+	def cancel(self):
+		'Drop the queued edits and unblock the nodes. Edits made by hand are kept.'
+		self.end()
+
+	def end(self):
+		if self.active:
+			self._setStates(self.nodeStates.items())
+		self.translates = {}
+		self.cvs = {}
+		self.nodeStates = {}
+		self.active = False
+
+
+def main():
+
+	muscleList = [
+		('L_pectoralisA', 6),
+		('L_pectoralisB', 6),
+		('L_pectoralisC', 6)
+		]
+
+	# Raise every control of x90_y0_wn45 by 0.5 with one re-evaluation
+	with PoseEditSession(muscleList) as session:
+		for muscleName, numCtrls in muscleList:
+			for cNum in range(1, numCtrls + 1):
+				target = '%s_control%s_x90_y0_wn45_target' % (muscleName, cNum)
+				x, y, z = mc.getAttr('%s.translate' % target)[0]
+				session.setTranslate(target, (x, y + 0.5, z))
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -0,0 +1,326 @@
+# neferPoseFill.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Pose grid operations in pure Python, for the pose arrays of neferPoseStore.PoseStore.
+
+The operations are linear: every result pose is a weighted sum of poses of the grid. They
+return blend recipes, [(pose, ((source pose, weight), ...)), ...], which
+neferPoseStore.blendPoses applies to every control and cross section channel at once. The
+grid is solved once per muscle set, not once per channel.
+
+harmonicFill fills the cells that were not authored by solving the discrete Laplace
+equation over the grid with the authored cells fixed. Neighbours are the next point by
+value along each axis (xn45 is next to x0), weighted by 1 / spacing, so a cell between two
+authored cells on one axis gets their linear interpolation.
+
+	recipes = harmonicFill(n3Grid(), authoredPoses)
+
+propagate copies a slice of the grid (the cells of one point of an axis, e.g. longitude x0)
+onto other slices of the same axis, or adds its offset from a rest pose to them:
+
+	recipes = propagate(n3Grid(), 'long', 'x0', ('x45', 'x90'), within=('y0', ))
+
+smooth runs a separable kernel along the axes. Authored cells can be pinned:
+
+	recipes = smooth(n3Grid(), (0.25, 0.5, 0.25), pinned=authoredPoses)
+
+mirrorCells maps the cells of the left side to the cells of the right side, swapping the
+sign of the axes whose angles run the other way on the right (e.g. twist: w45 to wn45).
+
+findJumps checks loaded pose arrays for broken cells: the jump of each control and cross
+section at a cell against its neighbours along each axis, flagged against a robust (median
+and median absolute deviation) threshold.
+'''
+
+import math
+
+from neferPoseGrid import cellNames
+
+
+def gridEdges(grid, scales=None):
+	'''Return the (cell a, cell b, weight) edges between neighbouring cells of a PoseGrid.
+	Neighbours are consecutive points by value along an axis, weighted by 1 / (scale *
+	spacing). scales weighs the axes against each other (e.g. twist degrees against
+	latitude degrees).'''
+	edges = []
+	for a, axis in enumerate(grid.axes):
+		scale = float(scales[a]) if scales else 1.0
+		edges.extend([(cell, other, 1.0 / (scale * spacing))
+			for cell, other, spacing in _axisEdges(grid, a)])
+	return edges
+
+
+def _axisEdges(grid, a):
+	'The (cell a, cell b, spacing) edges between neighbouring cells along axis a.'
+	edges = []
+	for line in _axisLines(grid, a):
+		edges.extend([(cellA, cellB, valueB - valueA)
+			for (cellA, valueA), (cellB, valueB) in zip(line, line[1:])])
+	return edges
+
+
+def _sparseSolve(rows, rhs):
+	'''Solve A X = B by Gaussian elimination on sparse rows. rows[i] is {column: value} of
+	row i of A, which must be symmetric positive definite (a Laplacian with fixed cells), so
+	no pivoting is needed. rhs[i] is {key: value} of row i of B. Returns X as a list of
+	{key: value}.'''
+	n = len(rows)
+	rows = [dict(row) for row in rows]
+	rhs = [dict(row) for row in rhs]
+	for k in range(n):
+		pivot = rows[k].get(k, 0.0)
+		if abs(pivot) < 1e-12:
+			raise ValueError('The grid has a region without authored cells')
+		for i in range(k + 1, n):
+			factor = rows[i].get(k)
+			if not factor:
+				continue
+			factor /= pivot
+			row = rows[i]
+			for j, value in rows[k].items():
+				if j >= k:
+					row[j] = row.get(j, 0.0) - factor * value
+			del row[k]
+			for key, value in rhs[k].items():
+				rhs[i][key] = rhs[i].get(key, 0.0) - factor * value
+	x = [None] * n
+	for k in range(n - 1, -1, -1):
+		solution = dict(rhs[k])
+		for j, value in rows[k].items():
+			if j > k:
+				for key, xValue in x[j].items():
+					solution[key] = solution.get(key, 0.0) - value * xValue
+		pivot = rows[k][k]
+		x[k] = dict((key, value / pivot) for key, value in solution.items()
+			if abs(value) > 1e-12)
+	return x
+
+
+def harmonicFill(grid, authored, scales=None, epsilon=1e-6):
+	'''Return the recipes of the cells of a PoseGrid that are not in authored (a list of
+	cell names). Each filled cell is a weighted sum of authored cells; the weights sum to 1.
+	Weights below epsilon are dropped and the rest renormalized.'''
+	names = grid.cellNames()
+	fixed = set(names.index(pose) for pose in authored)
+	free = [cell for cell in range(grid.numCells) if cell not in fixed]
+	row = dict((cell, i) for i, cell in enumerate(free))
+
+	# Laplacian rows of the free cells. The fixed neighbours go to the right hand side.
+	rows = [{} for cell in free]
+	rhs = [{} for cell in free]
+	for a, b, weight in gridEdges(grid, scales):
+		for cell, other in ((a, b), (b, a)):
+			if cell in fixed:
+				continue
+			i = row[cell]
+			rows[i][i] = rows[i].get(i, 0.0) + weight
+			if other in fixed:
+				rhs[i][other] = rhs[i].get(other, 0.0) + weight
+			else:
+				rows[i][row[other]] = rows[i].get(row[other], 0.0) - weight
+
+	recipes = []
+	for cell, weights in zip(free, _sparseSolve(rows, rhs)):
+		weights = [(source, weight) for source, weight in weights.items() if weight >= epsilon]
+		total = sum(weight for source, weight in weights)
+		recipes.append((names[cell], tuple((names[source], weight / total)
+			for source, weight in sorted(weights))))
+	return recipes
+
+
+def _axisIndex(grid, axis):
+	if isinstance(axis, int):
+		return axis
+	return [gridAxis.name for gridAxis in grid.axes].index(axis)
+
+
+def propagate(grid, axis, sourcePoint, destPoints, mode='copy', restPose=None, within=()):
+	'''Return the recipes that propagate the slice of sourcePoint on an axis (index or
+	name) of a PoseGrid to the slices of destPoints. within limits the slice to the cells
+	that have all of the given points of the other axes, e.g. ('y0', 'w90').
+
+		copy	the destination cell becomes the source cell. Control targets are offsets from
+				AUTO, so the control keeps the same offset from its AUTO position.
+		offset	the source cell's offset from restPose is added to the destination cell:
+				dest + source - rest. Use an unauthored cell for restPose, so its control
+				translates are 0 and its cross sections are the rest shape.'''
+	if mode not in ('copy', 'offset'):
+		raise ValueError('Unknown propagation mode %s' % mode)
+	if mode == 'offset' and restPose is None:
+		raise ValueError('offset propagation needs a restPose')
+	a = _axisIndex(grid, axis)
+	gridAxis = grid.axes[a]
+	names = grid.cellNames()
+	source = gridAxis.index(sourcePoint)
+	stride = grid.strides[a]
+
+	recipes = []
+	for cell, name in enumerate(names):
+		if (cell // stride) % len(gridAxis) != source:
+			continue
+		points = name.split('_')
+		if [point for point in within if point not in points]:
+			continue
+		for destPoint in destPoints:
+			dest = names[cell + (gridAxis.index(destPoint) - source) * stride]
+			if mode == 'copy':
+				recipes.append((dest, ((name, 1.0), )))
+			else:
+				recipes.append((dest, ((dest, 1.0), (name, 1.0), (restPose, -1.0))))
+	return recipes
+
+
+def mirrorCells(grid, negateAxes=()):
+	'''Return {cell name: mirrored cell name} for a PoseGrid. On the axes in negateAxes
+	(indices or names) a point maps to the point with the negated value.'''
+	negate = set(_axisIndex(grid, axis) for axis in negateAxes)
+	pointMaps = []
+	for a, axis in enumerate(grid.axes):
+		pointMap = {}
+		for name, value in axis.points:
+			if a not in negate:
+				pointMap[name] = name
+				continue
+			mirrored = [other for other, otherValue in axis.points
+				if abs(otherValue + value) < 1e-6]
+			if not mirrored:
+				raise ValueError('Axis %s has no point at %s to mirror %s to' % (axis.name,
+					-value, name))
+			pointMap[name] = mirrored[0]
+		pointMaps.append(pointMap)
+	names = cellNames([axis.names for axis in grid.axes])
+	mirroredNames = cellNames([[pointMap[point] for point in axis.names]
+		for axis, pointMap in zip(grid.axes, pointMaps)])
+	return dict(zip(names, mirroredNames))
+
+
+def smooth(grid, kernel=(0.25, 0.5, 0.25), axes=None, pinned=(), iterations=1):
+	'''Return the recipes that smooth a PoseGrid with a separable kernel (odd length,
+	centred), applied along each of axes (indices or names, all by default) in turn and
+	repeated iterations times. Neighbours are consecutive points by value; at the ends of an
+	axis the kernel is cut off and renormalized. The pinned cells keep their values.'''
+	if len(kernel) % 2 != 1:
+		raise ValueError('The smoothing kernel needs an odd number of weights')
+	names = grid.cellNames()
+	radius = len(kernel) // 2
+	axisList = range(len(grid.axes)) if axes is None else [_axisIndex(grid, axis)
+		for axis in axes]
+	pinnedCells = set(names.index(pose) for pose in pinned)
+
+	# Each cell as {source cell: weight}, composed pass by pass
+	cells = [{cell: 1.0} for cell in range(grid.numCells)]
+	for iteration in range(iterations):
+		for a in axisList:
+			axis = grid.axes[a]
+			stride = grid.strides[a]
+			order = [i for value, i in axis.sorted]
+			position = dict((i, p) for p, i in enumerate(order))
+			newCells = []
+			for cell in range(grid.numCells):
+				if cell in pinnedCells:
+					newCells.append(cells[cell])
+					continue
+				index = (cell // stride) % len(axis)
+				p = position[index]
+				taps = [(order[p + k], kernel[k + radius]) for k in range(-radius, radius + 1)
+					if 0 <= p + k < len(order)]
+				total = sum(weight for i, weight in taps)
+				combined = {}
+				for i, weight in taps:
+					for source, sourceWeight in cells[cell + (i - index) * stride].items():
+						combined[source] = combined.get(source, 0.0) + weight / total * sourceWeight
+				newCells.append(combined)
+			cells = newCells
+
+	return [(names[cell], tuple((names[source], weight)
+		for source, weight in sorted(cells[cell].items()) if weight))
+		for cell in range(grid.numCells) if cell not in pinnedCells]
+
+
+def _median(values):
+	values = sorted(values)
+	middle = len(values) // 2
+	if len(values) % 2:
+		return values[middle]
+	return 0.5 * (values[middle - 1] + values[middle])
+
+
+class JumpReport():
+	'''The cells flagged by findJumps.'''
+	def __init__(self):
+		self.jumps = []			# [(score, cell name, axis name, slot, jump, limit)]
+		self.numChecked = 0
+
+	def add(self, cell, axisName, slot, jump, limit):
+		self.jumps.append((jump / limit, cell, axisName, slot, jump, limit))
+
+	def cells(self):
+		'''Return [(number of flagged jumps, cell name)], most first. A broken cell is
+		flagged for most of its controls and cross sections.'''
+		counts = {}
+		for score, cell, axisName, slot, jump, limit in self.jumps:
+			counts[cell] = counts.get(cell, 0) + 1
+		return sorted([(count, cell) for cell, count in counts.items()], reverse=True)
+
+	def report(self, limit=10):
+		lines = ['%s jumps checked, %s flagged' % (self.numChecked, len(self.jumps))]
+		for count, cell in self.cells()[:limit]:
+			lines.append('\t%s: %s flagged jumps' % (cell, count))
+		for score, cell, axisName, slot, jump, jumpLimit in sorted(self.jumps, reverse=True)[:limit]:
+			lines.append('\t%s control%s %s at %s along %s: %.3g (limit %.3g)' % (slot[0],
+				slot[1], slot[2], cell, axisName, jump, jumpLimit))
+		return '\n'.join(lines)
+
+
+def _axisLines(grid, a):
+	'''The lines of cells along axis a, each as [(cell, value), ...] sorted by value.'''
+	axis = grid.axes[a]
+	stride = grid.strides[a]
+	return [[(cell + (i - (cell // stride) % len(axis)) * stride, value)
+		for value, i in axis.sorted]
+		for cell in range(grid.numCells) if (cell // stride) % len(axis) == 0]
+
+
+def findJumps(grid, values, slots, threshold=3.5, minJump=0.01):
+	'''Check the pose arrays values ({cell name: array}, e.g. PoseStore.values, with the
+	layout of slots) of a PoseGrid. Along each axis, the jump of a cell is the RMS distance
+	between the points of a control or cross section and the line through the two
+	neighbouring cells (a second finite difference). A smooth grid, however steep, has small
+	jumps; a cell sculpted away from its neighbours has a large one. A jump is flagged when
+	it is above median + threshold * 1.4826 * MAD of the same slot along the same axis, above
+	minJump, and not below the jumps of its neighbours on the line, which a broken cell
+	raises as well. Cells at the end of an axis are checked along the other axes.
+	Returns a JumpReport.'''
+	names = grid.cellNames()
+	report = JumpReport()
+	for a, axis in enumerate(grid.axes):
+		# (cell, cell a, cell b, t): the cell is checked against a + t * (b - a)
+		checks = []
+		for line in _axisLines(grid, a):
+			line = [(names[cell], value) for cell, value in line if names[cell] in values]
+			for (cellA, valueA), (cell, value), (cellB, valueB) in zip(line, line[1:],
+				line[2:]):
+				checks.append((cell, cellA, cellB, (value - valueA) / (valueB - valueA)))
+		if not checks:
+			continue
+		for slot in slots:
+			start, size = slot[3], slot[4]
+			jumps = []
+			for cell, cellA, cellB, t in checks:
+				array = values[cell]
+				arrayA = values[cellA]
+				arrayB = values[cellB]
+				squares = sum((array[i] - arrayA[i] - t * (arrayB[i] - arrayA[i])) ** 2
+					for i in range(start, start + size))
+				jumps.append(math.sqrt(3.0 * squares / size))
+			median = _median(jumps)
+			mad = _median([abs(jump - median) for jump in jumps])
+			limit = max(median + threshold * 1.4826 * mad, minJump)
+			report.numChecked += len(jumps)
+			cellJumps = dict((check[0], jump) for check, jump in zip(checks, jumps))
+			for (cell, cellA, cellB, t), jump in zip(checks, jumps):
+				if jump > limit and jump >= cellJumps.get(cellA, 0.0) and \
+					jump >= cellJumps.get(cellB, 0.0):
+					report.add(cell, axis.name, slot, jump, limit)
+	return report
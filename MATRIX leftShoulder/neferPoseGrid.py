@@ -0,0 +1,498 @@
+# neferPoseGrid.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Pose grid weights of a neferMuscle driver in pure Python.
+
+Computes what the axis data groups (makeSawtooth) and the multiply nodes of an N3 driver
+compute, for all the cells at once:
+
+	axis weight	= piecewise linear 'tent' over the axis points, held at the end points
+	cell weight	= product of the axis weights of the cell
+
+At most 2 points of an axis have a non-zero weight, so at most 2^n cells of an n axis
+grid are active. No Maya imports: runs inside the neferPoseGrid node and outside Maya.
+
+	grid = PoseGrid([
+		PoseGridAxis('long', (('x0', 0), ('x45', 45), ('x90', 90), ...)),
+		PoseGridAxis('lat', (('y0', 0), ('y45', 45), ...)),
+		PoseGridAxis('twist', (('w0', 0), ('w45', 45), ...))])
+	grid.cellNames()					# ['x0_y0_w0', 'x0_y0_w45', ...]
+	grid.sparseWeights((30, 60, 0))		# [(cellIndex, weight), ...]
+
+A PoseGridView is a coarser driver over a subset of the points of a grid (N3_muscleDriver3 uses
+y0/y90/y170 of the full latitude axis). Its weights are re-aggregated from the weights of the
+grid, so one grid computes the weights of every driver:
+
+	view = PoseGridView(grid, (None, ('y0', 'y90', 'y170'), None))
+	view.fromSparse(grid.sparseWeights((30, 60, 0)))
+
+A HierarchicalPoseGrid adds finer points in regions of a base grid (the fine twists near
+x90_y170 of N3MuscleDriver7.py) without a second driver. The base weights are truncated
+where the region's fine weights take over, so the weights still sum to 1 and stay
+continuous at the region boundary:
+
+	grid = HierarchicalPoseGrid(n3Grid(), [PoseGridRegion(n3Grid(), (
+		('x45', 'x135', ()),
+		('y135', 'y170', ()),
+		('wn90', 'w0', (('wn40', -40), ('wn50', -50), ...))))])
+
+A PolarPoseGrid is driven by swing-twist angles (neferSwingTwist.py). At latitude 0 every
+longitude is the same arm pose, so the latitude 0 cells of a twist are one pose cell:
+
+	grid = PolarPoseGrid(n3Grid())		# x0_y0_w0 replaces x45_y0_w0 ... xn45_y0_w0
+'''
+
+from neferSwingTwist import wrapAngle
+
+
+class PoseGridAxis():
+	'''One axis of a pose grid: the axis points as (name, value) pairs in driver order.'''
+	def __init__(self, name, points):
+		self.name = name
+		self.points = tuple((point[0], float(point[1])) for point in points)
+		self.names = [point[0] for point in self.points]
+		# Points sorted by value, as (value, index in driver order)
+		self.sorted = sorted((point[1], i) for i, point in enumerate(self.points))
+		self.values = [value for value, i in self.sorted]
+
+	def __len__(self):
+		return len(self.points)
+
+	def weights(self, value):
+		'''Return the non-zero axis weights for value as [(point index, weight)].'''
+		values = self.values
+		if len(values) == 1 or value <= values[0]:
+			return [(self.sorted[0][1], 1.0)]
+		if value >= values[-1]:
+			return [(self.sorted[-1][1], 1.0)]
+
+		# Find the span [lo, lo + 1] holding value
+		lo, hi = 0, len(values) - 1
+		while hi - lo > 1:
+			mid = (lo + hi) // 2
+			if values[mid] <= value:
+				lo = mid
+			else:
+				hi = mid
+		t = (value - values[lo]) / (values[hi] - values[lo])
+		weights = []
+		if t < 1.0:
+			weights.append((self.sorted[lo][1], 1.0 - t))
+		if t > 0.0:
+			weights.append((self.sorted[hi][1], t))
+		return weights
+
+	def denseWeights(self, value):
+		return denseWeights(self.weights(value), len(self.points))
+
+	def index(self, pointName):
+		return self.names.index(pointName)
+
+	def subset(self, pointNames):
+		'''Return the axis made of some of the points of this axis, in the order given.'''
+		return PoseGridAxis(self.name, [self.points[self.index(name)] for name in pointNames])
+
+	def projection(self, pointNames, pick=False):
+		'''Return, for every point of this axis, the [(subset index, factor)] that turns its
+		weight into the weights of the subset axis of pointNames.
+
+		The tents of a subset axis are linear between the subset points, which are points of
+		this axis, so a subset weight is the sum of the weights of this axis times the subset
+		tent at each point. This is exact. With pick=True the weights of the chosen points are
+		used as they are (N3_muscleDriver6 uses x90 and y170 of the full axes).'''
+		if pick:
+			picked = dict((self.index(name), j) for j, name in enumerate(pointNames))
+			return [[(picked[i], 1.0)] if i in picked else [] for i in range(len(self.points))]
+		subset = self.subset(pointNames)
+		return [subset.weights(point[1]) for point in self.points]
+
+
+def padActive(cells, numActive):
+	'''Return exactly numActive (cell index, weight) pairs. Unused pairs are (-1, 0.0).'''
+	return cells + [(-1, 0.0)] * (numActive - len(cells))
+
+
+def denseWeights(cells, numCells):
+	'''Return the weights of all the cells from (cell index, weight) pairs.'''
+	weights = [0.0] * numCells
+	for cell, weight in cells:
+		weights[cell] = weight
+	return weights
+
+
+class SparseGrid():
+	'''Base of the grids. A grid has numCells, numActive() and sparseWeights(values).'''
+	def activeWeights(self, values):
+		'''Return exactly numActive() (cell index, weight) pairs for the axis values. Unused
+		pairs are (-1, 0.0).'''
+		return padActive(self.sparseWeights(values), self.numActive())
+
+	def weights(self, values):
+		'''Return the weights of all the cells for the axis values.'''
+		return denseWeights(self.sparseWeights(values), self.numCells)
+
+
+class PoseGrid(SparseGrid):
+	'''A tensor product grid of axes. Cells are ordered like the driver attributes: the last
+	axis changes fastest.'''
+	def __init__(self, axes):
+		self.axes = list(axes)
+		self.strides = []
+		stride = 1
+		for axis in reversed(self.axes):
+			self.strides.insert(0, stride)
+			stride *= len(axis)
+		self.numCells = stride
+
+	def cellNames(self):
+		return cellNames([axis.names for axis in self.axes])
+
+	def cellIndex(self, pointIndices):
+		return sum(index * stride for index, stride in zip(pointIndices, self.strides))
+
+	def sparseWeights(self, values):
+		'''Return the active cells for the axis values as [(cell index, weight)].'''
+		cells = [(0, 1.0)]
+		for axis, stride, value in zip(self.axes, self.strides, values):
+			axisWeights = axis.weights(value)
+			cells = [(cell + index * stride, weight * axisWeight)
+				for cell, weight in cells for index, axisWeight in axisWeights]
+		return cells
+
+	def numActive(self):
+		'The most cells that can be active at once.'
+		return 2 ** len(self.axes)
+
+
+class PoseGridView(SparseGrid):
+	'''A coarser grid over a subset of the points of a PoseGrid. subsets has one entry per
+	axis of the grid: a tuple of point names, or None to leave the axis out (its weights are
+	summed). pickAxes are the indices of the axes whose points are picked instead of
+	re-aggregated (see PoseGridAxis.projection). The weights of a view with pickAxes sum to
+	less than 1 away from the picked points.'''
+	def __init__(self, grid, subsets, pickAxes=()):
+		if not isinstance(grid, PoseGrid):
+			# The cells of region and polar grids are not a tensor product of their axes
+			raise ValueError('A PoseGridView needs a PoseGrid, not a %s' %
+				grid.__class__.__name__)
+		self.grid = grid
+		self.pickAxes = tuple(pickAxes)
+		self.axes = []
+		self.projections = []
+		for i, (axis, pointNames) in enumerate(zip(grid.axes, subsets)):
+			if pointNames is None:
+				self.projections.append(None)
+				continue
+			self.axes.append(axis.subset(pointNames))
+			self.projections.append(axis.projection(pointNames, i in pickAxes))
+		self.view = PoseGrid(self.axes)
+		self.numCells = self.view.numCells
+
+		# Stride of each grid axis in the view (0 for the axes left out)
+		self.viewStrides = []
+		viewAxis = 0
+		for projection in self.projections:
+			if projection is None:
+				self.viewStrides.append(0)
+			else:
+				self.viewStrides.append(self.view.strides[viewAxis])
+				viewAxis += 1
+
+	def cellNames(self):
+		return self.view.cellNames()
+
+	def numActive(self):
+		# Neighbouring grid points fall in one span of the subset axis
+		return self.view.numActive()
+
+	def fromSparse(self, cells):
+		'''Return the view cells as [(cell index, weight)] from the sparse weights of the grid.'''
+		weights = {}
+		strides = self.grid.strides
+		for cell, weight in cells:
+			if cell < 0 or weight == 0.0:
+				continue
+			viewCells = [(0, weight)]
+			for axis, projection in enumerate(self.projections):
+				if projection is None:
+					continue
+				point = (cell // strides[axis]) % len(self.grid.axes[axis])
+				stride = self.viewStrides[axis]
+				viewCells = [(viewCell + index * stride, viewWeight * factor)
+					for viewCell, viewWeight in viewCells for index, factor in projection[point]]
+			for viewCell, viewWeight in viewCells:
+				weights[viewCell] = weights.get(viewCell, 0.0) + viewWeight
+		return sorted(item for item in weights.items() if item[1] != 0.0)
+
+	def sparseWeights(self, values):
+		return self.fromSparse(self.grid.sparseWeights(values))
+
+
+class PoseGridRegion():
+	'''Finer points inside a box of a base grid. ranges has one (first point, last point,
+	extra points) entry per axis: the box spans the base points first to last and the extra
+	(name, value) points are added inside it.
+
+	The fine weights of the points inside the box are used. Points on the box boundary are
+	left to the base grid, except at the ends of a base axis (the weights there are held).'''
+	def __init__(self, base, ranges):
+		self.base = base
+		self.box = []
+		axes = []
+		activePoints = []
+		for axis, (first, last, extraPoints) in zip(base.axes, ranges):
+			lo, hi = axis.points[axis.index(first)][1], axis.points[axis.index(last)][1]
+			if lo >= hi:
+				raise ValueError('Region of axis %s is empty: %s to %s' % (axis.name, first, last))
+			for name, value in extraPoints:
+				if not lo < value < hi:
+					raise ValueError('Point %s is outside %s to %s' % (name, first, last))
+			points = [point for point in axis.points if lo <= point[1] <= hi]
+			points.extend(extraPoints)
+			axes.append(PoseGridAxis(axis.name, points))
+
+			# The box is open at the ends of the base axis
+			loOpen, hiOpen = lo == axis.values[0], hi == axis.values[-1]
+			self.box.append((None if loOpen else lo, None if hiOpen else hi))
+			activePoints.append([i for i, point in enumerate(axes[-1].points)
+				if (lo < point[1] or loOpen) and (point[1] < hi or hiOpen)])
+		self.grid = PoseGrid(axes)
+
+		cellNames = self.grid.cellNames()
+		self.activeCells = {}
+		cells = [0]
+		for axis, stride, points in zip(self.grid.axes, self.grid.strides, activePoints):
+			cells = [cell + index * stride for cell in cells for index in points]
+		for cell in cells:
+			values = []
+			for axis, stride in zip(self.grid.axes, self.grid.strides):
+				values.append(axis.points[(cell // stride) % len(axis)][1])
+			# The base weights at the point, which the fine weight replaces
+			self.activeCells[cell] = (cellNames[cell], base.sparseWeights(values))
+
+	def overlaps(self, other):
+		for (lo, hi), (otherLo, otherHi) in zip(self.box, other.box):
+			if (hi is not None and otherLo is not None and hi <= otherLo) or (
+				otherHi is not None and lo is not None and otherHi <= lo):
+				return False
+		return True
+
+	def sparseWeights(self, values):
+		'''Return the weights of the active cells as [(region cell, weight)].'''
+		return [(cell, weight) for cell, weight in self.grid.sparseWeights(values)
+			if cell in self.activeCells]
+
+
+class HierarchicalPoseGrid(SparseGrid):
+	'''A base PoseGrid refined in PoseGridRegion boxes. The cells are the base cells followed
+	by the new cells of the regions. A region point on a base point keeps the base cell name,
+	so existing targets are used by the fine weights.
+
+	A base weight is truncated by the fine weights that replace it:
+
+		w(base cell) - sum(base weight of the cell at fine point * w(fine point))
+
+	which is zero for the base cells inside a region and blends to the full base weight at
+	its boundary.'''
+	def __init__(self, base, regions):
+		self.base = base
+		self.axes = base.axes
+		self.regions = list(regions)
+		for i, region in enumerate(self.regions):
+			for other in self.regions[:i]:
+				if region.overlaps(other):
+					raise ValueError('Pose grid regions overlap')
+
+		self.names = base.cellNames()
+		cellIndex = dict((name, i) for i, name in enumerate(self.names))
+		self.cellMaps = []
+		for region in self.regions:
+			cellMap = {}
+			for cell, (name, baseWeights) in sorted(region.activeCells.items()):
+				if name not in cellIndex:
+					cellIndex[name] = len(self.names)
+					self.names.append(name)
+				cellMap[cell] = cellIndex[name]
+			self.cellMaps.append(cellMap)
+		self.numCells = len(self.names)
+
+	def cellNames(self):
+		return list(self.names)
+
+	def numActive(self):
+		# Base cells plus the fine cells of one region
+		return 2 * self.base.numActive()
+
+	def sparseWeights(self, values):
+		weights = dict(self.base.sparseWeights(values))
+		for region, cellMap in zip(self.regions, self.cellMaps):
+			for cell, weight in region.sparseWeights(values):
+				index = cellMap[cell]
+				weights[index] = weights.get(index, 0.0) + weight
+				for baseCell, baseWeight in region.activeCells[cell][1]:
+					weights[baseCell] = weights.get(baseCell, 0.0) - baseWeight * weight
+		# Truncated weights can be left with rounding error instead of zero
+		return sorted(item for item in weights.items() if abs(item[1]) > 1e-9)
+
+
+class PolarPoseGrid(SparseGrid):
+	'''A grid (PoseGrid or HierarchicalPoseGrid) whose longitude and latitude axes are the
+	swing of a swing-twist decomposition. The cells at the pole (the latitude point at 0)
+	are merged into the cell of the pole longitude point, for every other axis point. The
+	longitude is wrapped into the range of the longitude points.'''
+	def __init__(self, grid, longAxis=0, latAxis=1, poleLongitude='x0'):
+		self.grid = grid
+		self.axes = grid.axes
+		self.longAxis = longAxis
+		self.latAxis = latAxis
+		latitudes = grid.axes[latAxis]
+		if latitudes.values[0] != 0.0:
+			raise ValueError('Latitude axis %s has no point at the pole' % latitudes.name)
+		pole = latitudes.sorted[0][1]
+		self.poleName = latitudes.names[pole]
+		self.poleLongitude = poleLongitude
+
+		self.names = []
+		self.cellMap = []
+		cellIndex = {}
+		for name in grid.cellNames():
+			points = name.split('_')
+			if points[latAxis] == self.poleName:
+				points[longAxis] = poleLongitude
+			name = '_'.join(points)
+			if name not in cellIndex:
+				cellIndex[name] = len(self.names)
+				self.names.append(name)
+			self.cellMap.append(cellIndex[name])
+		self.numCells = len(self.names)
+
+	def cellNames(self):
+		return list(self.names)
+
+	def numActive(self):
+		return self.grid.numActive()
+
+	def sparseWeights(self, values):
+		values = list(values)
+		longitudes = self.axes[self.longAxis].values
+		values[self.longAxis] = wrapAngle(values[self.longAxis], longitudes[0], longitudes[-1])
+		weights = {}
+		for cell, weight in self.grid.sparseWeights(values):
+			index = self.cellMap[cell]
+			weights[index] = weights.get(index, 0.0) + weight
+		return sorted(weights.items())
+
+
+def pruneWeights(cells, epsilon, renormalize=True):
+	'''Drop the (cell, weight) pairs with a weight below epsilon and, unless renormalize is
+	off, scale the rest so they sum to 1. Returns the cells unchanged when epsilon is 0 or
+	nothing is left.'''
+	if not epsilon:
+		return cells
+	kept = [(cell, weight) for cell, weight in cells if abs(weight) >= epsilon]
+	if kept and not renormalize:
+		return kept
+	total = sum(weight for cell, weight in kept)
+	if not kept or abs(total) < 1e-12:
+		return cells
+	return [(cell, weight / total) for cell, weight in kept]
+
+
+class SweepReport():
+	'''Partition of unity diagnostics over an angle sweep.'''
+	def __init__(self, epsilon=1e-4):
+		self.epsilon = epsilon
+		self.numSamples = 0
+		self.maxError = 0.0
+		self.worstValues = None
+		self.maxActive = 0
+		self.numTiny = 0			# Weights above 0 but below epsilon
+
+	def add(self, values, weights):
+		self.numSamples += 1
+		error = abs(sum(weights) - 1.0)
+		if error > self.maxError or self.worstValues is None:
+			self.maxError = error
+			self.worstValues = tuple(values)
+		self.maxActive = max(self.maxActive, len([weight for weight in weights if weight]))
+		self.numTiny += len([weight for weight in weights if 0 < abs(weight) < self.epsilon])
+
+	def report(self):
+		return ('%s samples: largest partition of unity error %.3g at %s, at most %s active '
+			'weights, %s weights below %g' % (self.numSamples, self.maxError,
+			self.worstValues, self.maxActive, self.numTiny, self.epsilon))
+
+
+def sweepValues(ranges, steps):
+	'''Return every combination of steps values over the (lo, hi) range of each axis.'''
+	samples = [()]
+	for lo, hi in ranges:
+		axisValues = [lo + (hi - lo) * i / float(max(steps - 1, 1)) for i in range(steps)]
+		samples = [sample + (value, ) for sample in samples for value in axisValues]
+	return samples
+
+
+def sweep(weights, ranges, steps=25, epsilon=1e-4):
+	'''Evaluate weights(values) (e.g. grid.weights) over the angle ranges and return a
+	SweepReport.'''
+	report = SweepReport(epsilon)
+	for values in sweepValues(ranges, steps):
+		report.add(values, weights(values))
+	return report
+
+
+def cellNames(data):
+	'''Return the cell names of the axis point name lists in data, in build order (the last
+	axis changes fastest): ['x0_y0_w0', 'x0_y0_w45', ...].'''
+	names = ['']
+	for axisPts in data:
+		names = [(name + '_' + point).lstrip('_') for name in names for point in axisPts]
+	return names
+
+
+def poseHierarchy(data):
+	'''Yield (pose, parent pose, leaf) for the pose groups of the axis point lists in data,
+	any number of axes, parents first and in build order:
+
+		('x0', '', False), ('x0_y0', 'x0', False), ('x0_y0_w0', 'x0_y0', True), ...'''
+	def _walk(parent, axis):
+		for point in data[axis]:
+			pose = (parent + '_' + point).lstrip('_')
+			leaf = axis == len(data) - 1
+			yield pose, parent, leaf
+			if not leaf:
+				for item in _walk(pose, axis + 1):
+					yield item
+	if data:
+		for item in _walk('', 0):
+			yield item
+
+
+def mergeAxes(axisLists):
+	'''Return the union of several lists of (name, value) axis points, keeping the order of
+	the first list and adding new points in the order they are found. A point name must
+	always have the same value.'''
+	points = []
+	values = {}
+	for axisPoints in axisLists:
+		for name, value in axisPoints:
+			if name in values:
+				if values[name] != float(value):
+					raise ValueError('Axis point %s has the values %s and %s' % (name,
+						values[name], value))
+				continue
+			values[name] = float(value)
+			points.append((name, value))
+	return points
+
+
+def n3Grid():
+	'The grid of N3_muscleDriver1.'
+	return PoseGrid([
+		PoseGridAxis('long', (
+			('x0', 0), ('x45', 45), ('x90', 90), ('x135', 135), ('x180', 180), ('xn45', -45))),
+		PoseGridAxis('lat', (
+			('y0', 0), ('y45', 45), ('y90', 90), ('y135', 135), ('y170', 170))),
+		PoseGridAxis('twist', (
+			('w0', 0), ('w45', 45), ('w90', 90), ('wn45', -45), ('wn90', -90)))])
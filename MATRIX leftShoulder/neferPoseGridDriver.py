@@ -0,0 +1,607 @@
+# neferPoseGridDriver.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Build an N3 driver as one neferPoseGrid node instead of axis data groups and a multiply3
+node per grid cell. PoseAxisData replaces a single sawtooth axis data group.
+
+1. Load the neferPoseGridNode.py plug-in.
+2. Create the node, set the axis point values and connect the arm angles.
+3. Alias output[cell] to the cell names so the driver plugs keep their names
+   (N3_muscleDriver1.x0_y0_w0).
+4. Optionally move the connections of an existing driver group to the new node.
+
+SparseControl and SparseCrossSection replace the point constraint and blend shape node of a
+muscle control and cross section with a neferSparseBlend / neferSparseCurveBlend node that
+reads only the driver's active cells (activeIndex[], activeWeight[]).
+
+PoseGridDriverView is a driver over a subset of the axis points of a shared PoseGridDriver
+(a neferPoseGridView node). N3_muscleDriver1, N3_muscleDriver3 and N3_muscleDriver6 become
+views of one grid, so the weights are computed once instead of by three multiply networks.
+
+SwingTwist is a neferSwingTwist node. Its longitude, latitude and twist drive a polar
+PoseGridDriver ('pole' in the driver data), which has one pose cell at latitude 0 per twist.
+
+PlaybackLOD switches the lod of the pose grid drivers to a coarser grid (e.g. twist held at
+w0) while the timeline plays and back to the full grid when it stops. Only the drivers'
+lod attribute changes; nothing is rebuilt or reconnected. The script job is killed with the
+scene, so a script node stored in the scene starts it again when the scene is opened.
+
+Every driver node has an epsilon ('epsilon' in the driver data): weights below it are dropped
+and the rest renormalized. sweepDriver reports the partition of unity error of any driver
+in the scene, including the old data group and multiply drivers.
+
+PoseRBFDriver is a neferPoseRBF node: the weights of scattered sample poses (e.g. 40 chosen
+with neferPoseRBF.farthestSamples) instead of all 150 cells of the grid.
+'''
+
+import maya.cmds as mc
+
+from neferPoseGrid import (PoseGrid, PoseGridAxis, PoseGridView, PoseGridRegion,
+	HierarchicalPoseGrid, PolarPoseGrid, SweepReport, mergeAxes, sweepValues)
+from neferPoseRBF import PoseRBF, farthestSamples
+from neferRegistry import existingNames
+
+pluginName = 'neferPoseGridNode.py'
+
+
+def loadPlugin():
+	if not mc.pluginInfo(pluginName, q=True, loaded=True):
+		# The folder must be on MAYA_PLUG_IN_PATH
+		mc.loadPlugin(pluginName)
+
+
+def driverAxes(driverData):
+	'''Return the axes of driverData as (axis name, plug, points). Axes can be given as
+	(plug, points) or (axis name, plug, points).'''
+	return [tuple(axis) if len(axis) == 3 else (str(i), ) + tuple(axis)
+		for i, axis in enumerate(driverData['axes'])]
+
+
+def moveConnections(oldNode, newNode, attrNames):
+	'''Connect newNode.attr to every destination of oldNode.attr for the attributes in
+	attrNames. Returns the number of connections moved.'''
+	attrSet = set(attrNames)
+	pairs = mc.listConnections(oldNode, source=False, destination=True, connections=True,
+		plugs=True) or []
+	moved = 0
+	for i in range(0, len(pairs), 2):
+		attr = pairs[i].split('.', 1)[1]
+		if attr in attrSet:
+			mc.connectAttr('%s.%s' % (newNode, attr), pairs[i + 1], force=True)
+			moved += 1
+	return moved
+
+
+class PoseGridDriver():
+	'''A neferPoseGrid node. driverData is a dict like the NDriver3Axes data, with the axis
+	points as (name, value) pairs and the driving plug of each axis:
+
+		'driverName'	:	'N3_muscleDriver1',
+		'axes'			:	(('L_humerus_nspace_jnt.longitude', (('x0', 0), ...)), ...)
+
+	and optionally finer points in regions of the grid (see PoseGridRegion), one
+	(first point, last point, extra points) range per axis:
+
+		'regions'		:	((('x45', 'x135', ()), ('y135', 'y170', ()),
+								('wn90', 'w0', (('wn40', -40), ...))), )
+
+	There can be any number of axes, e.g. the shoulder axes and elbow flexion for a biceps.
+	An axis can also be given as (axis name, plug, points):
+
+		('flex', 'L_elbow_ctrl.rotateZ', (('a0', 0), ('a45', 45), ...))
+
+	The driver is one node however many axes there are. NeferMuscle builds the pose groups
+	for any number of axes (neferPoseGrid.poseHierarchy).
+
+	With swing-twist inputs, the longitude axis, latitude axis and pole longitude point:
+
+		'pole'			:	(0, 1, 'x0')
+
+	The axes held at playback (see PlaybackLOD) and their values, e.g. twist at w0:
+
+		'playbackHold'	:	((2, 0.0), )
+
+	Weights below epsilon are dropped and the rest renormalized (0 to keep them all):
+
+		'epsilon'		:	0.001
+	'''
+	def __init__(self, driverData):
+		self.name = driverData['driverName']
+		axes = driverAxes(driverData)
+		self.axisPlugs = [axis[1] for axis in axes]
+		self.grid = PoseGrid([PoseGridAxis(axis[0], axis[2]) for axis in axes])
+		self.regions = [PoseGridRegion(self.grid, ranges)
+			for ranges in driverData.get('regions', ())]
+		if self.regions:
+			self.grid = HierarchicalPoseGrid(self.grid, self.regions)
+		self.playbackHold = driverData.get('playbackHold', ())
+		self.epsilon = driverData.get('epsilon', 0.0)
+		self.pole = driverData.get('pole')
+		if self.pole:
+			self.grid = PolarPoseGrid(self.grid, *self.pole)
+		self.cellNames = self.grid.cellNames()
+
+	def create(self, parentGrp=None):
+		loadPlugin()
+		mc.createNode('neferPoseGrid', name=self.name)
+		for i, axis in enumerate(self.grid.axes):
+			mc.setAttr('%s.axisValues[%s]' % (self.name, i),
+				[point[1] for point in axis.points], type='doubleArray')
+			mc.connectAttr(self.axisPlugs[i], '%s.input[%s]' % (self.name, i))
+		for r, region in enumerate(self.regions):
+			mc.setAttr('%s.regions[%s]' % (self.name, r), self.regionValues(region),
+				type='doubleArray')
+		if self.pole:
+			longAxis, latAxis, poleLongitude = self.pole
+			mc.setAttr('%s.pole' % self.name, [longAxis, latAxis,
+				self.grid.axes[longAxis].index(poleLongitude)], type='Int32Array')
+		for axis, value in self.playbackHold:
+			mc.setAttr('%s.lodHold[%s]' % (self.name, axis), True)
+			mc.setAttr('%s.lodValue[%s]' % (self.name, axis), value)
+		mc.setAttr('%s.epsilon' % self.name, self.epsilon)
+		for cell, cellName in enumerate(self.cellNames):
+			mc.aliasAttr(cellName, '%s.output[%s]' % (self.name, cell))
+		return self.name
+
+	def regionValues(self, region):
+		'The regions[r] array of a region: first, last, number of extras, extras... per axis.'
+		values = []
+		for axis, regionAxis in zip(self.grid.axes, region.grid.axes):
+			baseValues = [value for name, value in regionAxis.points if name in axis.names]
+			extraValues = [value for name, value in regionAxis.points if name not in axis.names]
+			values.extend([min(baseValues), max(baseValues), len(extraValues)] + extraValues)
+		return values
+
+	def takeOver(self, oldDriver):
+		'''Move every outgoing connection of the old driver's cell attributes to the same
+		cell on this node. Returns the number of connections moved.'''
+		return moveConnections(oldDriver, self.name, self.cellNames)
+
+	def connectActive(self, node):
+		'Connect the active cell pairs of the driver to a sparse consumer node.'
+		_connectActive(self.name, 'active', node, self.grid.numActive())
+
+
+def _connectActive(driverNode, prefix, node, numActive):
+	for k in range(numActive):
+		for attr in ('Index', 'Weight'):
+			mc.connectAttr('%s.%s%s[%s]' % (driverNode, prefix, attr, k),
+				'%s.active%s[%s]' % (node, attr, k))
+
+
+class PlaybackLOD():
+	'''One level attribute (0 full, 1 playback) connected to the lod of every driver, and a
+	script job that sets it while the timeline plays. Renders and a stopped timeline use
+	the full grid.'''
+	def __init__(self, name='N3_poseLOD'):
+		self.name = name
+		self.scriptNode = '%s_scriptNode' % name
+
+	def create(self):
+		if not mc.objExists(self.name):
+			mc.createNode('network', name=self.name)
+			mc.addAttr(self.name, longName='level', attributeType='enum', enumName='full:playback')
+			mc.addAttr(self.name, longName='playbackLevel', attributeType='enum',
+				enumName='full:playback', defaultValue=1)
+		return self.name
+
+	def connect(self, drivers):
+		'Connect the level to the lod of the driver nodes (names or PoseGridDriver).'
+		for driver in drivers:
+			mc.connectAttr('%s.level' % self.name, '%s.lod' % getattr(driver, 'name', driver),
+				force=True)
+
+	def update(self):
+		playing = mc.play(q=True, state=True)
+		level = mc.getAttr('%s.playbackLevel' % self.name) if playing else 0
+		if mc.getAttr('%s.level' % self.name) != level:
+			mc.setAttr('%s.level' % self.name, level)
+
+	def startJob(self):
+		'''Start the script job. It is killed with the scene. Returns the job number.'''
+		return mc.scriptJob(conditionChange=['playingBack', self.update], killWithScene=True)
+
+	def storeJob(self):
+		'''Store a script node in the scene that starts the script job when the scene is
+		opened with the interface (scriptType 2), and start the job now. Returns the job
+		number.'''
+		if not mc.objExists(self.scriptNode):
+			mc.scriptNode(name=self.scriptNode, scriptType=2, sourceType='python',
+				beforeScript='import neferPoseGridDriver\n'
+					'neferPoseGridDriver.PlaybackLOD(%r).startJob()' % self.name)
+		return self.startJob()
+
+
+class SwingTwist():
+	'''A neferSwingTwist node measuring a joint from its current (rest) pose. Connect
+	name.longitude, name.latitude and name.twist to a polar PoseGridDriver instead of the
+	Euler attributes (L_humerus_nspace_jnt.longitude, L_arm_ctrl.twist).'''
+	def __init__(self, name, joint, twistAxis=0, referenceAxis=1):
+		self.name = name
+		self.joint = joint
+		self.twistAxis = twistAxis
+		self.referenceAxis = referenceAxis
+
+	def create(self):
+		loadPlugin()
+		mc.createNode('neferSwingTwist', name=self.name)
+		mc.setAttr('%s.restMatrix' % self.name, mc.getAttr('%s.matrix' % self.joint),
+			type='matrix')
+		mc.setAttr('%s.twistAxis' % self.name, self.twistAxis)
+		mc.setAttr('%s.referenceAxis' % self.name, self.referenceAxis)
+		mc.connectAttr('%s.matrix' % self.joint, '%s.inputMatrix' % self.name)
+		return self.name
+
+	def plugs(self):
+		return ['%s.%s' % (self.name, attr) for attr in ('longitude', 'latitude', 'twist')]
+
+
+class PoseRBFDriver():
+	'''A neferPoseRBF node. driverData has the driving plug of each axis and the sample poses
+	as (name, axis values) pairs. Output j is aliased to the name of sample j, so muscles
+	connect to N3_poseRBF1.x90_y45_w0 as they do to a grid driver.
+
+		'driverName'	:	'N3_poseRBF1',
+		'axisPlugs'		:	('L_humerus_nspace_jnt.longitude', ...),
+		'samples'		:	(('x0_y0_w0', (0, 0, 0)), ('x90_y45_w0', (90, 45, 0)), ...),
+		'scales'		:	(1, 1, 0.5),		# Optional
+		'width'			:	0,					# Optional, 0 for the mean sample spacing
+		'epsilon'		:	0.001				# Optional, see PoseGridDriver
+	'''
+	def __init__(self, driverData):
+		self.name = driverData['driverName']
+		self.axisPlugs = driverData['axisPlugs']
+		self.samples = driverData['samples']
+		self.scales = driverData.get('scales')
+		self.width = driverData.get('width', 0)
+		self.epsilon = driverData.get('epsilon', 0.0)
+		# Solved here too, so a bad sample set fails before the scene is changed
+		self.rbf = PoseRBF(self.samples, self.scales, self.width or None)
+		self.cellNames = self.rbf.cellNames()
+
+	def create(self):
+		loadPlugin()
+		mc.createNode('neferPoseRBF', name=self.name)
+		for i, plug in enumerate(self.axisPlugs):
+			mc.connectAttr(plug, '%s.input[%s]' % (self.name, i))
+		for j, sample in enumerate(self.samples):
+			mc.setAttr('%s.samples[%s]' % (self.name, j), list(sample[1]), type='doubleArray')
+		if self.scales:
+			mc.setAttr('%s.scales' % self.name, list(self.scales), type='doubleArray')
+		mc.setAttr('%s.width' % self.name, self.width)
+		mc.setAttr('%s.epsilon' % self.name, self.epsilon)
+		for cell, cellName in enumerate(self.cellNames):
+			mc.aliasAttr(cellName, '%s.output[%s]' % (self.name, cell))
+		return self.name
+
+	def takeOver(self, oldDriver):
+		'''Move the connections of the sample poses on an existing driver to this node. The
+		targets of the other poses can be deleted.'''
+		return moveConnections(oldDriver, self.name, self.cellNames)
+
+
+def sweepDriver(driverName, cellNames, sweepPlugs, ranges, steps=9, epsilon=1e-4):
+	'''Step the character through the angle ranges and read the driver's cell weights.
+	sweepPlugs are the settable plugs of the axes as (plug, scale) pairs, e.g.
+	('L_arm_ctrl.rotateX', -1) for the latitude. Returns a SweepReport. The plugs are set
+	back when done.'''
+	original = [mc.getAttr(plug) for plug, scale in sweepPlugs]
+	report = SweepReport(epsilon)
+	try:
+		for values in sweepValues(ranges, steps):
+			for (plug, scale), value in zip(sweepPlugs, values):
+				mc.setAttr(plug, value * scale)
+			report.add(values, [mc.getAttr('%s.%s' % (driverName, cellName))
+				for cellName in cellNames])
+	finally:
+		for (plug, scale), value in zip(sweepPlugs, original):
+			mc.setAttr(plug, value)
+	return report
+
+
+def mergeDriverData(driverName, driverDataList):
+	'''Return the driverData of one shared driver with the axis points of all the drivers in
+	driverDataList. The drivers must have the same axes, in the same order.'''
+	axesList = [driverAxes(driverData) for driverData in driverDataList]
+	axes = []
+	for i, axis in enumerate(axesList[0]):
+		for driverData, driverAxesI in zip(driverDataList, axesList):
+			if driverAxesI[i][1] != axis[1]:
+				raise ValueError('%s axis %s is driven by %s, not %s' % (
+					driverData['driverName'], i, driverAxesI[i][1], axis[1]))
+		axes.append((axis[0], axis[1], mergeAxes([driverAxesI[i][2]
+			for driverAxesI in axesList])))
+	return {'driverName' : driverName, 'axes' : tuple(axes)}
+
+
+class PoseGridDriverView():
+	'''A neferPoseGridView node over a shared PoseGridDriver without regions. viewData has one
+	entry per axis of the shared driver: the point names the view uses, or None to leave the
+	axis out.
+
+		'driverName'	:	'N3_muscleDriver3',
+		'axes'			:	(('x0', ...), ('y0', 'y90', 'y170'), None),
+		'pickAxes'		:	(),			# Axes whose point weights are used as they are
+		'epsilon'		:	0.0			# Optional, see PoseGridDriver
+
+	With pickAxes the weights below epsilon are dropped but the rest are not renormalized,
+	since the picked weights do not sum to 1. A driver with regions or swing-twist inputs
+	cannot be shared by views and raises ValueError.
+
+	Output cells are aliased to the view cell names, so takeOver() moves the connections of
+	an existing driver of the same name and points.'''
+	def __init__(self, driver, viewData):
+		self.name = viewData['driverName']
+		self.driver = driver
+		self.subsets = viewData['axes']
+		self.pickAxes = viewData.get('pickAxes', ())
+		self.epsilon = viewData.get('epsilon', 0.0)
+		self.grid = PoseGridView(driver.grid, self.subsets, self.pickAxes)
+		self.cellNames = self.grid.cellNames()
+
+	def create(self):
+		loadPlugin()
+		mc.createNode('neferPoseGridView', name=self.name)
+		for i, axis in enumerate(self.driver.grid.axes):
+			mc.connectAttr('%s.axisValues[%s]' % (self.driver.name, i),
+				'%s.axisValues[%s]' % (self.name, i))
+			if self.subsets[i] is not None:
+				mc.setAttr('%s.axisPoints[%s]' % (self.name, i),
+					[axis.index(name) for name in self.subsets[i]], type='Int32Array')
+			mc.setAttr('%s.pickAxis[%s]' % (self.name, i), i in self.pickAxes)
+		mc.setAttr('%s.epsilon' % self.name, self.epsilon)
+		self.driver.connectActive(self.name)
+		for cell, cellName in enumerate(self.cellNames):
+			mc.aliasAttr(cellName, '%s.output[%s]' % (self.name, cell))
+		return self.name
+
+	def takeOver(self, oldDriver):
+		return moveConnections(oldDriver, self.name, self.cellNames)
+
+	def connectActive(self, node):
+		_connectActive(self.name, 'outActive', node, self.grid.numActive())
+
+
+class SparseControl():
+	'''Drive a Maya Muscle control from the active cells of a PoseGridDriver instead of a
+	point constraint to every target. The control pose groups are parent constrained to the
+	control's AUTO group, so the target translates are already in the control's space.'''
+	def __init__(self, muscleName, cNum, driver, targetSuffix=''):
+		self.name = 'iControlMidMus_%s%s1' % (muscleName, str(cNum))
+		self.constraint = '%s_pointConstraint1' % self.name
+		self.blendNode = '%s_sparseBlend' % self.name
+		self.targets = ['%s_control%s_%s%s_target' % (muscleName, str(cNum), cellName,
+			targetSuffix) for cellName in driver.cellNames]
+		self.driver = driver
+
+	def create(self):
+		mc.createNode('neferSparseBlend', name=self.blendNode)
+		# Logical index of target[] is the driver cell index
+		existing = set(existingNames(self.targets))
+		for cell, target in enumerate(self.targets):
+			if target in existing:
+				mc.connectAttr('%s.translate' % target, '%s.target[%s]' % (self.blendNode, cell))
+		self.driver.connectActive(self.blendNode)
+		if mc.objExists(self.constraint):
+			mc.delete(self.constraint)
+		mc.connectAttr('%s.output' % self.blendNode, '%s.translate' % self.name, force=True)
+		return self.blendNode
+
+
+class SparseCrossSection():
+	'''Drive a Maya Muscle cross section from the active cells of a PoseGridDriver instead of
+	a blend shape node with a weight for every target.'''
+	def __init__(self, muscleName, cNum, driver, targetSuffix=''):
+		self.name = 'iControlMidMus_%s%s1_crossSectionREST' % (muscleName, str(cNum))
+		self.blendShape = '%s_blendShape' % self.name
+		self.blendNode = '%s_sparseBlend' % self.name
+		self.targets = ['%s_crossSection%s_%s%s_target' % (muscleName, str(cNum), cellName,
+			targetSuffix) for cellName in driver.cellNames]
+		self.driver = driver
+
+	def create(self):
+		shape = mc.listRelatives(self.name, shapes=True, noIntermediate=True, fullPath=True)[0]
+		mc.createNode('neferSparseCurveBlend', name=self.blendNode)
+		# The base curve is the Orig shape the blend shape deforms. It is kept when the blend
+		# shape is deleted, unlike the groupParts or tweak nodes between them.
+		origShapes = [node for node in mc.listRelatives(self.name, shapes=True,
+			fullPath=True) or [] if mc.getAttr('%s.intermediateObject' % node)]
+		if mc.objExists(self.blendShape):
+			mc.delete(self.blendShape)
+		if origShapes:
+			baseCurve = '%s.local' % origShapes[0]
+		else:
+			baseCurve = mc.duplicate(self.name, name='%sOrig' % self.name)[0]
+			baseCurve = '%s.local' % mc.listRelatives(baseCurve, shapes=True, fullPath=True)[0]
+		mc.connectAttr(baseCurve, '%s.baseCurve' % self.blendNode)
+
+		existing = set(existingNames(self.targets))
+		for cell, target in enumerate(self.targets):
+			if target in existing:
+				targetShape = mc.listRelatives(target, shapes=True, fullPath=True)[0]
+				mc.connectAttr('%s.local' % targetShape, '%s.targetCurve[%s]' % (self.blendNode,
+					cell))
+		self.driver.connectActive(self.blendNode)
+		mc.connectAttr('%s.outputCurve' % self.blendNode, '%s.create' % shape, force=True)
+		return self.blendNode
+
+
+def sparseMuscle(muscleName, numCtrls, driver, targetSuffix='', crossSections=True):
+	'''Switch every control and cross section of a neferMuscle to sparse consumer nodes.'''
+	mc.undoInfo(openChunk=True)
+	try:
+		for cNum in range(1, numCtrls + 1):
+			SparseControl(muscleName, cNum, driver, targetSuffix).create()
+			if crossSections:
+				SparseCrossSection(muscleName, cNum, driver, targetSuffix).create()
+	finally:
+		mc.undoInfo(closeChunk=True)
+
+
+class PoseAxisData():
+	'''An axis data group computed by a one axis neferPoseGrid node instead of set driven key
+	sawtooth curves. Same arguments as AxisData in N3MuscleDriver7.py and the point
+	attributes keep their names (N3_twist_data3.wn40), so multiply nodes and NDriver3Axes
+	connect to it unchanged. The weights are the same as the sawtooth curves.'''
+	def __init__(self, grpName, dataPts, driver):
+		self.grpName = grpName
+		self.dataPts = []
+		self.driver = driver
+		self.makeDataNode()
+		self.addPoints(dataPts)
+
+	def makeDataNode(self):
+		loadPlugin()
+		mc.createNode('neferPoseGrid', name=self.grpName)
+		mc.connectAttr(self.driver, '%s.input[0]' % self.grpName)
+
+	def addPoints(self, dataPts):
+		'''Add axis points, e.g. (('x22h', 22.5), ). The points do not need to be in order,
+		so existing connections to output[] keep their index.'''
+		start = len(self.dataPts)
+		self.dataPts.extend(dataPts)
+		mc.setAttr('%s.axisValues[0]' % self.grpName, [point[1] for point in self.dataPts],
+			type='doubleArray')
+		for i, point in enumerate(dataPts):
+			mc.aliasAttr(point[0], '%s.output[%s]' % (self.grpName, start + i))
+
+	def takeOver(self, oldGrp):
+		'''Move the outgoing connections of an existing sawtooth data group to this node.
+		The old group and its animCurves can then be deleted.'''
+		return moveConnections(oldGrp, self.grpName, [point[0] for point in self.dataPts])
+
+
+def main():
+
+	n3driverData = {
+		'driverName'	: 	'N3_poseGridDriver1',
+		'axes'			: 	(
+			('L_humerus_nspace_jnt.longitude',
+				(('x0', 0), ('x45', 45), ('x90', 90), ('x135', 135), ('x180', 180), ('xn45', -45))),
+			('L_humerus_nspace_jnt.latitude',
+				(('y0', 0), ('y45', 45), ('y90', 90), ('y135', 135), ('y170', 170))),
+			('L_arm_ctrl.twist',
+				(('w0', 0), ('w45', 45), ('w90', 90), ('wn45', -45), ('wn90', -90)))),
+		'playbackHold'	: 	((2, 0.0), ),
+		'epsilon'		: 	0.001
+		}
+
+	n3driver = PoseGridDriver(n3driverData)
+
+	# Partition of unity of the old driver before it is replaced
+	sweepPlugs = (('L_arm_ctrl.rotateY', 1), ('L_arm_ctrl.rotateX', -1), ('L_arm_ctrl.twist', 1))
+	print sweepDriver('N3_muscleDriver1', n3driver.cellNames, sweepPlugs,
+		((-45, 180), (0, 170), (-90, 90))).report()
+
+	n3driver.create()
+	print '%s connections moved' % n3driver.takeOver('N3_muscleDriver1')
+
+	# Longitude x latitude only (twist w0) while the timeline plays
+	lod = PlaybackLOD()
+	lod.create()
+	lod.connect([n3driver])
+	lod.storeJob()
+
+	# The N3_muscleDriver1 multiply network can now be deleted:
+	# mc.delete(mc.ls('N3_muscleDriver1_multiply_*'))
+
+	# Or one shared grid for N3_muscleDriver1, 3 and 6 (N3MuscleDriver7.py twists):
+	fineTwistData = {
+		'driverName'	: 	'N3_muscleDriver6',
+		'axes'			: 	(
+			n3driverData['axes'][0],
+			n3driverData['axes'][1],
+			('L_arm_ctrl.twist',
+				(('wn40', -40), ('wn50', -50), ('wn60', -60), ('wn70', -70), ('wn80', -80),
+				('wn90', -90))))
+		}
+	sharedDriver = PoseGridDriver(mergeDriverData('N3_sharedPoseGrid',
+		[n3driverData, fineTwistData]))
+
+	views = [
+		PoseGridDriverView(sharedDriver, {
+			'driverName'	: 	'N3_poseGridView1',
+			'axes'			: 	(
+				('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+				('y0', 'y45', 'y90', 'y135', 'y170'),
+				('w0', 'w45', 'w90', 'wn45', 'wn90'))
+			}),
+		PoseGridDriverView(sharedDriver, {
+			'driverName'	: 	'N3_poseGridView3',
+			'axes'			: 	(
+				('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+				('y0', 'y90', 'y170'),
+				None)
+			}),
+		PoseGridDriverView(sharedDriver, {
+			'driverName'	: 	'N3_poseGridView6',
+			'axes'			: 	(
+				('x90', ),
+				('y170', ),
+				('wn40', 'wn50', 'wn60', 'wn70', 'wn80', 'wn90')),
+			'pickAxes'		: 	(0, 1)
+			})
+		]
+
+	# Or the fine twists as a region of N3_poseGridDriver1, with 5 new cells and no second
+	# driver (x90_y170_wn45 and x90_y170_wn90 are shared):
+	# n3driverData['regions'] = (
+	# 	(('x45', 'x135', ()), ('y135', 'y170', ()), ('wn90', 'w0', (('wn40', -40),
+	# 		('wn50', -50), ('wn60', -60), ('wn70', -70), ('wn80', -80)))), )
+
+	# Or N3_upperArm_driver (nm.makeDriver2) as one node:
+	# upperArmDriver = PoseGridDriver({
+	# 	'driverName'	: 	'N3_upperArm_poseGrid',
+	# 	'axes'			: 	(
+	# 		('flex', 'L_elbow_ctrl.rotateZ',
+	# 			(('a0', 0), ('a45', 45), ('a90', 90), ('a135', 135), ('a150', 150))),
+	# 		('pronation', 'L_hand_ctrl.pronation', (('b0', 0), ('b140', 140))))
+	# 	})
+
+	# Or a biceps driver on the shoulder and the elbow. Use a view (PoseGridDriverView) or
+	# an RBF driver to author fewer than all the cells:
+	# bicepsDriver = PoseGridDriver({
+	# 	'driverName'	: 	'N4_biceps_poseGrid',
+	# 	'axes'			: 	n3driverData['axes'] + (
+	# 		('flex', 'L_elbow_ctrl.rotateZ', (('a0', 0), ('a90', 90), ('a150', 150))), )
+	# 	})
+
+	# Or a swing-twist driver, with x0_y0_* shared by all the longitudes (the copies made by
+	# shoulderY0BlendShapeCopy.py are not needed). Create with the arm in its rest pose:
+	# swingTwist = SwingTwist('N3_humerus_swingTwist', 'L_humerus_nspace_jnt')
+	# swingTwist.create()
+	# polarDriver = PoseGridDriver({
+	# 	'driverName'	: 	'N3_polarPoseGrid1',
+	# 	'axes'			: 	zip(swingTwist.plugs(), [axis[1] for axis in n3driverData['axes']]),
+	# 	'pole'			: 	(0, 1, 'x0')
+	# 	})
+	# polarDriver.create()
+	# print '%s connections moved' % polarDriver.takeOver('N3_muscleDriver1')
+
+	# Or an RBF driver with 40 of the 150 poses:
+	# grid = PoseGridDriver(n3driverData).grid
+	# cellValues = [[axis.points[(cell // stride) % len(axis)][1]
+	# 	for axis, stride in zip(grid.axes, grid.strides)] for cell in range(grid.numCells)]
+	# samples = farthestSamples(zip(grid.cellNames(), cellValues), 40, 'x0_y0_w0')
+	# rbfDriver = PoseRBFDriver({
+	# 	'driverName'	: 	'N3_poseRBF1',
+	# 	'axisPlugs'		: 	[axis[0] for axis in n3driverData['axes']],
+	# 	'samples'		: 	samples
+	# 	})
+	# rbfDriver.create()
+	# print '%s connections moved' % rbfDriver.takeOver('N3_muscleDriver1')
+
+	# sharedDriver.create()
+	# for view, oldDriver in zip(views, ('N3_muscleDriver1', 'N3_muscleDriver3',
+	# 	'N3_muscleDriver6')):
+	# 	view.create()
+	# 	print '%s connections moved' % view.takeOver(oldDriver)
+
+	# Or read only the active cells of the driver:
+	# sparseMuscle('L_teresMajor', 5, n3driver)
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -0,0 +1,896 @@
+# neferPoseGridNode.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Maya plug-in (Python API 2.0): the neferPoseGrid driver node and its sparse consumers.
+
+neferPoseGrid
+One node replaces the axis data groups and the per cell multiply3 network of an N3 driver.
+It takes one input angle per axis, the axis point values per axis, and writes the weights of
+the grid cells. The weights are computed by neferPoseGrid.PoseGrid.
+
+	input[i]			angle of axis i (e.g. L_humerus_nspace_jnt.longitude)
+	axisValues[i]		the axis point values of axis i, in driver order
+	regions[r]			optional refined region r of a HierarchicalPoseGrid. For every axis:
+						first value, last value, number of extra points, extra values...
+	pole				optional longitude axis, latitude axis and pole longitude point of a
+						PolarPoseGrid, for swing-twist inputs
+	epsilon				weights below epsilon are dropped and the rest renormalized (0 off)
+	lod					0 full grid, 1 playback: the held axes are read at lodValue
+	lodHold[i]			hold axis i at playback
+	lodValue[i]			value of axis i at playback (0 for twist w0)
+	output[cell]		cell weight; the last axis changes fastest
+	activeIndex[k]		cell index of active pair k (-1 when unused), k < 2^axes
+	activeWeight[k]		weight of active pair k
+
+Consumers of output[] are dirtied through every cell. Consumers of the active pairs are
+dirtied through 2^axes plugs (8 for the shoulder) whatever the size of the grid.
+
+neferSwingTwist
+Swing-twist angles of a joint (see neferSwingTwist.py), the inputs of a polar neferPoseGrid.
+
+	inputMatrix			the joint's matrix
+	restMatrix			the joint's matrix in the rest pose
+	twistAxis			arm axis: 0 X, 1 Y, 2 Z
+	referenceAxis		longitude 0 direction
+	longitude, latitude, twist
+
+neferPoseGridView
+A coarser driver over a subset of the points of a shared neferPoseGrid without regions (see
+neferPoseGrid.PoseGridView). Re-aggregates the active pairs of the shared grid, so the grid
+weights are computed once for all the drivers.
+
+	axisValues[i]		from the shared grid's axisValues[i]
+	axisPoints[i]		indices of the points of axis i used by the view; empty to leave it out
+	pickAxis[i]			use the weights of the points of axis i as they are
+	epsilon				as neferPoseGrid, without the renormalizing if an axis is picked
+	activeIndex[k]		from the shared grid
+	activeWeight[k]		from the shared grid
+	output[cell]		view cell weight
+	outActiveIndex[k]	active pairs of the view, for sparse consumers
+	outActiveWeight[k]
+
+neferPoseRBF
+Radial basis function driver (see neferPoseRBF.py): the weights of scattered sample poses
+instead of the cells of a grid.
+
+	input[i]			angle of axis i
+	samples[j]			axis values of sample pose j
+	scales				axis scales, optional
+	width				Gaussian radius in scaled units, 0 for the mean sample spacing
+	epsilon				as neferPoseGrid
+	output[j]			weight of sample pose j
+
+neferSparseBlend
+Sparse replacement for the point constraint of a Maya Muscle control.
+
+	target[cell]		translate of the control target of the cell
+	activeIndex[k]		from the driver
+	activeWeight[k]		from the driver
+	output				weighted translate; connect to the control's translate
+
+neferSparseCurveBlend
+Sparse replacement for the blend shape node of a Maya Muscle cross section.
+
+	baseCurve			the cross section without poses (local space)
+	targetCurve[cell]	cross section target curve of the cell (local space)
+	activeIndex[k]		from the driver
+	activeWeight[k]		from the driver
+	outputCurve			connect to the cross section shape's create
+
+neferPoseSelector
+Solo pose visibility from one value (see neferPoseSelect.py).
+
+	selector			1 + index of the pose to show, 0 to show none
+	numPoses			number of poses
+	autoDisplay			show the poses of the active driver cells instead of the selected pose
+	cellPose			pose index of each driver cell (-1 for none)
+	activeIndex[k]		from the driver, connected only while autoDisplay is on
+	activeWeight[k]		from the driver, connected only while autoDisplay is on
+	output[i]			True for the selected pose only, or for the poses of the active cells
+						with autoDisplay; connect to the pose group visibility
+
+neferSetBools (command)
+Set many bool plugs with one undoable MDGModifier, so they are written and dirtied as one
+batch: mc.neferSetBools('a.b', True, 'c.d', False, ...).
+
+Load with mc.loadPlugin and build with neferPoseGridDriver.py, which aliases output[cell]
+to the cell names (x0_y0_w0, ...) so existing connections keep their attribute names.
+'''
+
+import maya.api.OpenMaya as om
+
+from neferPoseGrid import (PoseGrid, PoseGridAxis, PoseGridView, PoseGridRegion,
+	HierarchicalPoseGrid, PolarPoseGrid, pruneWeights, padActive, denseWeights)
+from neferPoseRBF import PoseRBF
+from neferSwingTwist import swingTwist
+
+
+def maya_useNewAPI():
+	pass
+
+
+def _isPlug(plug, attr):
+	'Return True if plug is attr or an element of attr.'
+	return plug == attr or (plug.isElement and plug.array() == attr)
+
+
+def _readActive(dataBlock, indexAttr, weightAttr):
+	'Return the (cell index, weight) pairs connected to a sparse consumer.'
+	indexHandle = dataBlock.inputArrayValue(indexAttr)
+	weightHandle = dataBlock.inputArrayValue(weightAttr)
+	weights = {}
+	for i in range(weightHandle.elementCount()):
+		weightHandle.jumpToPhysicalElement(i)
+		weights[weightHandle.elementIndex()] = weightHandle.inputValue().asFloat()
+	active = []
+	for i in range(indexHandle.elementCount()):
+		indexHandle.jumpToPhysicalElement(i)
+		cell = indexHandle.inputValue().asInt()
+		weight = weights.get(indexHandle.elementIndex(), 0.0)
+		if cell >= 0 and weight != 0.0:
+			active.append((cell, weight))
+	return active
+
+
+def _readAxisValues(dataBlock, attr):
+	'Return the double arrays of a multi of doubleArray attributes as lists.'
+	valuesHandle = dataBlock.inputArrayValue(attr)
+	axisValues = []
+	for i in range(valuesHandle.elementCount()):
+		valuesHandle.jumpToPhysicalElement(i)
+		data = valuesHandle.inputValue().data()
+		axisValues.append(list(om.MFnDoubleArrayData(data).array()) if not data.isNull() else [])
+	return axisValues
+
+
+def _makeGrid(axisValues):
+	return PoseGrid([PoseGridAxis(str(i), [(str(j), value) for j, value in enumerate(values)])
+		for i, values in enumerate(axisValues)])
+
+
+def _writeActive(dataBlock, indexAttr, weightAttr, active):
+	'Write (cell index, weight) pairs to a pair of output multis.'
+	indexHandle = dataBlock.outputArrayValue(indexAttr)
+	weightHandle = dataBlock.outputArrayValue(weightAttr)
+	indexBuilder = indexHandle.builder()
+	weightBuilder = weightHandle.builder()
+	for k, (cell, weight) in enumerate(active):
+		indexBuilder.addElement(k).setInt(cell)
+		weightBuilder.addElement(k).setFloat(weight)
+	indexHandle.set(indexBuilder)
+	weightHandle.set(weightBuilder)
+	indexHandle.setAllClean()
+	weightHandle.setAllClean()
+
+
+def _addEpsilon(nodeClass):
+	numericAttr = om.MFnNumericAttribute()
+	nodeClass.epsilon = numericAttr.create('epsilon', 'eps', om.MFnNumericData.kDouble, 0.0)
+	numericAttr.setMin(0.0)
+	nodeClass.addAttribute(nodeClass.epsilon)
+
+
+def _writeWeights(dataBlock, attr, weights):
+	outputHandle = dataBlock.outputArrayValue(attr)
+	builder = outputHandle.builder()
+	for cell, weight in enumerate(weights):
+		builder.addElement(cell).setFloat(weight)
+	outputHandle.set(builder)
+	outputHandle.setAllClean()
+
+
+def _makeRegion(base, r, values):
+	'''Return the PoseGridRegion of a regions[r] array. Point names are the indices of the
+	base points, so the cell order is the same as the HierarchicalPoseGrid of the driver.'''
+	ranges = []
+	i = 0
+	for axis in base.axes:
+		first, last, numExtra = values[i], values[i + 1], int(values[i + 2])
+		extraPoints = [('r%sp%s' % (r, k), value)
+			for k, value in enumerate(values[i + 3:i + 3 + numExtra])]
+		ranges.append((axis.names[[point[1] for point in axis.points].index(first)],
+			axis.names[[point[1] for point in axis.points].index(last)], extraPoints))
+		i += 3 + numExtra
+	return PoseGridRegion(base, ranges)
+
+
+def _addArrayOutputs(nodeClass, outputs):
+	'''Create output multis from (longName, shortName, numeric type) and return them.'''
+	numericAttr = om.MFnNumericAttribute()
+	attrs = []
+	for longName, shortName, dataType in outputs:
+		attrs.append(numericAttr.create(longName, shortName, dataType, 0))
+		numericAttr.array = True
+		numericAttr.usesArrayDataBuilder = True
+		numericAttr.writable = False
+		numericAttr.storable = False
+		nodeClass.addAttribute(attrs[-1])
+	return attrs
+
+
+def _addActiveInputs(nodeClass):
+	'Create the activeIndex[] and activeWeight[] inputs of a sparse consumer.'
+	numericAttr = om.MFnNumericAttribute()
+	nodeClass.activeIndex = numericAttr.create('activeIndex', 'ai', om.MFnNumericData.kInt, -1)
+	numericAttr.array = True
+	nodeClass.activeWeight = numericAttr.create('activeWeight', 'aw', om.MFnNumericData.kFloat,
+		0.0)
+	numericAttr.array = True
+	nodeClass.addAttribute(nodeClass.activeIndex)
+	nodeClass.addAttribute(nodeClass.activeWeight)
+
+
+class NeferPoseGridNode(om.MPxNode):
+	typeName = 'neferPoseGrid'
+	typeId = om.MTypeId(0x0007F0C0)		# Local development range
+
+	input = None
+	axisValues = None
+	regions = None
+	pole = None
+	epsilon = None
+	lod = None
+	lodHold = None
+	lodValue = None
+	output = None
+	activeIndex = None
+	activeWeight = None
+
+	def __init__(self):
+		om.MPxNode.__init__(self)
+		self.gridKey = None
+		self.grid = None
+
+	def getGrid(self, axisValues, regionValues, pole):
+		'''Return the PoseGrid (HierarchicalPoseGrid with regions, PolarPoseGrid with a pole)
+		for the axis values. Rebuilt only when the values change.'''
+		key = (tuple(tuple(values) for values in axisValues),
+			tuple(tuple(values) for values in regionValues), tuple(pole))
+		if key != self.gridKey:
+			self.grid = _makeGrid(key[0])
+			if regionValues:
+				self.grid = HierarchicalPoseGrid(self.grid, [_makeRegion(self.grid, r, values)
+					for r, values in enumerate(regionValues)])
+			if len(pole) == 3:
+				self.grid = PolarPoseGrid(self.grid, pole[0], pole[1], str(pole[2]))
+			self.gridKey = key
+		return self.grid
+
+	def readInputs(self, dataBlock):
+		'Return (grid, angles), or (None, angles) if the node is not set up.'
+		inputHandle = dataBlock.inputArrayValue(NeferPoseGridNode.input)
+		angles = []
+		for i in range(inputHandle.elementCount()):
+			inputHandle.jumpToPhysicalElement(i)
+			angles.append(inputHandle.inputValue().asDouble())
+
+		if dataBlock.inputValue(NeferPoseGridNode.lod).asShort():
+			# Playback: the held axes use a single axis point (twist w0)
+			holdHandle = dataBlock.inputArrayValue(NeferPoseGridNode.lodHold)
+			valueHandle = dataBlock.inputArrayValue(NeferPoseGridNode.lodValue)
+			for i in range(holdHandle.elementCount()):
+				holdHandle.jumpToPhysicalElement(i)
+				axis = holdHandle.elementIndex()
+				if holdHandle.inputValue().asBool() and axis < len(angles):
+					try:
+						valueHandle.jumpToLogicalElement(axis)
+						angles[axis] = valueHandle.inputValue().asDouble()
+					except RuntimeError:
+						angles[axis] = 0.0
+
+		axisValues = _readAxisValues(dataBlock, NeferPoseGridNode.axisValues)
+		regionValues = [values for values in _readAxisValues(dataBlock, NeferPoseGridNode.regions)
+			if values]
+		poleData = dataBlock.inputValue(NeferPoseGridNode.pole).data()
+		pole = list(om.MFnIntArrayData(poleData).array()) if not poleData.isNull() else []
+
+		if axisValues and len(angles) >= len(axisValues) and min(map(len, axisValues)):
+			return self.getGrid(axisValues, regionValues, pole), angles
+		return None, angles
+
+	def compute(self, plug, dataBlock):
+		isOutput = _isPlug(plug, NeferPoseGridNode.output)
+		if not isOutput and not (_isPlug(plug, NeferPoseGridNode.activeIndex) or
+			_isPlug(plug, NeferPoseGridNode.activeWeight)):
+			return None
+
+		grid, angles = self.readInputs(dataBlock)
+		cells = []
+		if grid:
+			epsilon = dataBlock.inputValue(NeferPoseGridNode.epsilon).asDouble()
+			cells = pruneWeights(grid.sparseWeights(angles), epsilon)
+
+		if isOutput:
+			_writeWeights(dataBlock, NeferPoseGridNode.output,
+				denseWeights(cells, grid.numCells) if grid else [])
+		else:
+			_writeActive(dataBlock, NeferPoseGridNode.activeIndex, NeferPoseGridNode.activeWeight,
+				padActive(cells, grid.numActive()) if grid else [])
+
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferPoseGridNode()
+
+	@staticmethod
+	def initialize():
+		numericAttr = om.MFnNumericAttribute()
+		typedAttr = om.MFnTypedAttribute()
+
+		NeferPoseGridNode.input = numericAttr.create('input', 'in', om.MFnNumericData.kDouble, 0.0)
+		numericAttr.array = True
+		numericAttr.keyable = True
+
+		NeferPoseGridNode.axisValues = typedAttr.create('axisValues', 'av',
+			om.MFnData.kDoubleArray)
+		typedAttr.array = True
+
+		NeferPoseGridNode.regions = typedAttr.create('regions', 'rg', om.MFnData.kDoubleArray)
+		typedAttr.array = True
+
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.input)
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.axisValues)
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.regions)
+
+		NeferPoseGridNode.pole = typedAttr.create('pole', 'pl', om.MFnData.kIntArray)
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.pole)
+
+		_addEpsilon(NeferPoseGridNode)
+
+		enumAttr = om.MFnEnumAttribute()
+		NeferPoseGridNode.lod = enumAttr.create('lod', 'lod', 0)
+		enumAttr.addField('full', 0)
+		enumAttr.addField('playback', 1)
+		enumAttr.keyable = True
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.lod)
+
+		NeferPoseGridNode.lodHold = numericAttr.create('lodHold', 'lh', om.MFnNumericData.kBoolean,
+			False)
+		numericAttr.array = True
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.lodHold)
+
+		NeferPoseGridNode.lodValue = numericAttr.create('lodValue', 'lv',
+			om.MFnNumericData.kDouble, 0.0)
+		numericAttr.array = True
+		NeferPoseGridNode.addAttribute(NeferPoseGridNode.lodValue)
+
+		outputs = _addArrayOutputs(NeferPoseGridNode, (
+			('output', 'out', om.MFnNumericData.kFloat),
+			('activeIndex', 'ai', om.MFnNumericData.kInt),
+			('activeWeight', 'aw', om.MFnNumericData.kFloat)))
+		NeferPoseGridNode.output, NeferPoseGridNode.activeIndex, NeferPoseGridNode.activeWeight = (
+			outputs)
+		for output in outputs:
+			NeferPoseGridNode.attributeAffects(NeferPoseGridNode.input, output)
+			NeferPoseGridNode.attributeAffects(NeferPoseGridNode.axisValues, output)
+			NeferPoseGridNode.attributeAffects(NeferPoseGridNode.regions, output)
+			NeferPoseGridNode.attributeAffects(NeferPoseGridNode.pole, output)
+			for attr in (NeferPoseGridNode.epsilon, NeferPoseGridNode.lod,
+				NeferPoseGridNode.lodHold, NeferPoseGridNode.lodValue):
+				NeferPoseGridNode.attributeAffects(attr, output)
+
+
+class NeferSwingTwistNode(om.MPxNode):
+	typeName = 'neferSwingTwist'
+	typeId = om.MTypeId(0x0007F0C5)
+
+	inputMatrix = None
+	restMatrix = None
+	twistAxis = None
+	referenceAxis = None
+	longitude = None
+	latitude = None
+	twist = None
+
+	def compute(self, plug, dataBlock):
+		outputs = (NeferSwingTwistNode.longitude, NeferSwingTwistNode.latitude,
+			NeferSwingTwistNode.twist)
+		if plug not in outputs:
+			return None
+
+		matrix = dataBlock.inputValue(NeferSwingTwistNode.inputMatrix).asMatrix()
+		restMatrix = dataBlock.inputValue(NeferSwingTwistNode.restMatrix).asMatrix()
+		twistAxis = dataBlock.inputValue(NeferSwingTwistNode.twistAxis).asShort()
+		referenceAxis = dataBlock.inputValue(NeferSwingTwistNode.referenceAxis).asShort()
+		if referenceAxis == twistAxis:
+			referenceAxis = (twistAxis + 1) % 3
+
+		# Rotation from the rest pose, in the rest pose's space
+		rotation = om.MTransformationMatrix(matrix * restMatrix.inverse()).rotation(
+			asQuaternion=True)
+		values = swingTwist((rotation.x, rotation.y, rotation.z, rotation.w), twistAxis,
+			referenceAxis)
+
+		for attr, value in zip(outputs, values):
+			handle = dataBlock.outputValue(attr)
+			handle.setDouble(value)
+			handle.setClean()
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferSwingTwistNode()
+
+	@staticmethod
+	def initialize():
+		matrixAttr = om.MFnMatrixAttribute()
+		enumAttr = om.MFnEnumAttribute()
+		numericAttr = om.MFnNumericAttribute()
+
+		NeferSwingTwistNode.inputMatrix = matrixAttr.create('inputMatrix', 'im')
+		NeferSwingTwistNode.addAttribute(NeferSwingTwistNode.inputMatrix)
+		NeferSwingTwistNode.restMatrix = matrixAttr.create('restMatrix', 'rm')
+		NeferSwingTwistNode.addAttribute(NeferSwingTwistNode.restMatrix)
+
+		for longName, shortName, default in (('twistAxis', 'ta', 0), ('referenceAxis', 'ra', 1)):
+			attr = enumAttr.create(longName, shortName, default)
+			for i, axisName in enumerate('XYZ'):
+				enumAttr.addField(axisName, i)
+			setattr(NeferSwingTwistNode, longName, attr)
+			NeferSwingTwistNode.addAttribute(attr)
+
+		outputs = []
+		for longName, shortName in (('longitude', 'lo'), ('latitude', 'la'), ('twist', 'tw')):
+			outputs.append(numericAttr.create(longName, shortName, om.MFnNumericData.kDouble, 0.0))
+			numericAttr.writable = False
+			numericAttr.storable = False
+			NeferSwingTwistNode.addAttribute(outputs[-1])
+		NeferSwingTwistNode.longitude, NeferSwingTwistNode.latitude, NeferSwingTwistNode.twist = (
+			outputs)
+
+		for attr in (NeferSwingTwistNode.inputMatrix, NeferSwingTwistNode.restMatrix,
+			NeferSwingTwistNode.twistAxis, NeferSwingTwistNode.referenceAxis):
+			for output in outputs:
+				NeferSwingTwistNode.attributeAffects(attr, output)
+
+
+class NeferPoseGridViewNode(om.MPxNode):
+	typeName = 'neferPoseGridView'
+	typeId = om.MTypeId(0x0007F0C3)
+
+	axisValues = None
+	axisPoints = None
+	pickAxis = None
+	epsilon = None
+	activeIndex = None
+	activeWeight = None
+	output = None
+	outActiveIndex = None
+	outActiveWeight = None
+
+	def __init__(self):
+		om.MPxNode.__init__(self)
+		self.viewKey = None
+		self.view = None
+
+	def getView(self, dataBlock):
+		'Return the PoseGridView, or None if the node is not set up.'
+		axisValues = _readAxisValues(dataBlock, NeferPoseGridViewNode.axisValues)
+
+		pointsHandle = dataBlock.inputArrayValue(NeferPoseGridViewNode.axisPoints)
+		axisPoints = {}
+		for i in range(pointsHandle.elementCount()):
+			pointsHandle.jumpToPhysicalElement(i)
+			data = pointsHandle.inputValue().data()
+			if not data.isNull():
+				axisPoints[pointsHandle.elementIndex()] = tuple(om.MFnIntArrayData(data).array())
+
+		pickHandle = dataBlock.inputArrayValue(NeferPoseGridViewNode.pickAxis)
+		pickAxes = []
+		for i in range(pickHandle.elementCount()):
+			pickHandle.jumpToPhysicalElement(i)
+			if pickHandle.inputValue().asBool():
+				pickAxes.append(pickHandle.elementIndex())
+
+		key = (tuple(tuple(values) for values in axisValues),
+			tuple(sorted(axisPoints.items())), tuple(pickAxes))
+		if key != self.viewKey:
+			self.view = None
+			if axisValues and min(map(len, axisValues)):
+				# Point names of the grid axes are their indices
+				subsets = [tuple(str(j) for j in axisPoints[i]) if axisPoints.get(i) else None
+					for i in range(len(axisValues))]
+				self.view = PoseGridView(_makeGrid(axisValues), subsets, pickAxes)
+			self.viewKey = key
+		return self.view
+
+	def compute(self, plug, dataBlock):
+		isOutput = _isPlug(plug, NeferPoseGridViewNode.output)
+		if not isOutput and not (_isPlug(plug, NeferPoseGridViewNode.outActiveIndex) or
+			_isPlug(plug, NeferPoseGridViewNode.outActiveWeight)):
+			return None
+
+		view = self.getView(dataBlock)
+		cells = []
+		if view:
+			cells = pruneWeights(view.fromSparse(_readActive(dataBlock,
+				NeferPoseGridViewNode.activeIndex, NeferPoseGridViewNode.activeWeight)),
+				dataBlock.inputValue(NeferPoseGridViewNode.epsilon).asDouble(),
+				not view.pickAxes)
+
+		if isOutput:
+			_writeWeights(dataBlock, NeferPoseGridViewNode.output,
+				denseWeights(cells, view.numCells) if view else [])
+		else:
+			_writeActive(dataBlock, NeferPoseGridViewNode.outActiveIndex,
+				NeferPoseGridViewNode.outActiveWeight,
+				padActive(cells, view.numActive()) if view else [])
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferPoseGridViewNode()
+
+	@staticmethod
+	def initialize():
+		numericAttr = om.MFnNumericAttribute()
+		typedAttr = om.MFnTypedAttribute()
+
+		NeferPoseGridViewNode.axisValues = typedAttr.create('axisValues', 'av',
+			om.MFnData.kDoubleArray)
+		typedAttr.array = True
+		NeferPoseGridViewNode.addAttribute(NeferPoseGridViewNode.axisValues)
+
+		NeferPoseGridViewNode.axisPoints = typedAttr.create('axisPoints', 'ap',
+			om.MFnData.kIntArray)
+		typedAttr.array = True
+		NeferPoseGridViewNode.addAttribute(NeferPoseGridViewNode.axisPoints)
+
+		NeferPoseGridViewNode.pickAxis = numericAttr.create('pickAxis', 'pa',
+			om.MFnNumericData.kBoolean, False)
+		numericAttr.array = True
+		NeferPoseGridViewNode.addAttribute(NeferPoseGridViewNode.pickAxis)
+
+		_addEpsilon(NeferPoseGridViewNode)
+		_addActiveInputs(NeferPoseGridViewNode)
+
+		outputs = _addArrayOutputs(NeferPoseGridViewNode, (
+			('output', 'out', om.MFnNumericData.kFloat),
+			('outActiveIndex', 'oai', om.MFnNumericData.kInt),
+			('outActiveWeight', 'oaw', om.MFnNumericData.kFloat)))
+		(NeferPoseGridViewNode.output, NeferPoseGridViewNode.outActiveIndex,
+			NeferPoseGridViewNode.outActiveWeight) = outputs
+
+		for attr in (NeferPoseGridViewNode.axisValues, NeferPoseGridViewNode.axisPoints,
+			NeferPoseGridViewNode.pickAxis, NeferPoseGridViewNode.epsilon,
+			NeferPoseGridViewNode.activeIndex, NeferPoseGridViewNode.activeWeight):
+			for output in outputs:
+				NeferPoseGridViewNode.attributeAffects(attr, output)
+
+
+class NeferPoseRBFNode(om.MPxNode):
+	typeName = 'neferPoseRBF'
+	typeId = om.MTypeId(0x0007F0C4)
+
+	input = None
+	samples = None
+	scales = None
+	width = None
+	epsilon = None
+	output = None
+
+	def __init__(self):
+		om.MPxNode.__init__(self)
+		self.rbfKey = None
+		self.rbf = None
+
+	def getRBF(self, samples, scales, width):
+		'The factored PoseRBF. Solved again only when the samples change.'
+		key = (tuple(tuple(sample) for sample in samples), tuple(scales), width)
+		if key != self.rbfKey:
+			self.rbf = PoseRBF([(str(j), sample) for j, sample in enumerate(samples)],
+				scales or None, width or None)
+			self.rbfKey = key
+		return self.rbf
+
+	def compute(self, plug, dataBlock):
+		if not _isPlug(plug, NeferPoseRBFNode.output):
+			return None
+
+		inputHandle = dataBlock.inputArrayValue(NeferPoseRBFNode.input)
+		angles = []
+		for i in range(inputHandle.elementCount()):
+			inputHandle.jumpToPhysicalElement(i)
+			angles.append(inputHandle.inputValue().asDouble())
+		samples = [sample for sample in _readAxisValues(dataBlock, NeferPoseRBFNode.samples)
+			if sample]
+		scalesData = dataBlock.inputValue(NeferPoseRBFNode.scales).data()
+		scales = list(om.MFnDoubleArrayData(scalesData).array()) if not scalesData.isNull() else []
+		width = dataBlock.inputValue(NeferPoseRBFNode.width).asDouble()
+
+		weights = []
+		if samples and len(angles) >= len(samples[0]):
+			rbf = self.getRBF(samples, scales, width)
+			weights = denseWeights(pruneWeights(rbf.sparseWeights(angles),
+				dataBlock.inputValue(NeferPoseRBFNode.epsilon).asDouble()), rbf.numCells)
+		_writeWeights(dataBlock, NeferPoseRBFNode.output, weights)
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferPoseRBFNode()
+
+	@staticmethod
+	def initialize():
+		numericAttr = om.MFnNumericAttribute()
+		typedAttr = om.MFnTypedAttribute()
+
+		NeferPoseRBFNode.input = numericAttr.create('input', 'in', om.MFnNumericData.kDouble, 0.0)
+		numericAttr.array = True
+		numericAttr.keyable = True
+		NeferPoseRBFNode.addAttribute(NeferPoseRBFNode.input)
+
+		NeferPoseRBFNode.samples = typedAttr.create('samples', 'sm', om.MFnData.kDoubleArray)
+		typedAttr.array = True
+		NeferPoseRBFNode.addAttribute(NeferPoseRBFNode.samples)
+
+		NeferPoseRBFNode.scales = typedAttr.create('scales', 'sc', om.MFnData.kDoubleArray)
+		NeferPoseRBFNode.addAttribute(NeferPoseRBFNode.scales)
+
+		NeferPoseRBFNode.width = numericAttr.create('width', 'wd', om.MFnNumericData.kDouble, 0.0)
+		numericAttr.setMin(0.0)
+		NeferPoseRBFNode.addAttribute(NeferPoseRBFNode.width)
+
+		_addEpsilon(NeferPoseRBFNode)
+
+		NeferPoseRBFNode.output, = _addArrayOutputs(NeferPoseRBFNode, (
+			('output', 'out', om.MFnNumericData.kFloat), ))
+		for attr in (NeferPoseRBFNode.input, NeferPoseRBFNode.samples, NeferPoseRBFNode.scales,
+			NeferPoseRBFNode.width, NeferPoseRBFNode.epsilon):
+			NeferPoseRBFNode.attributeAffects(attr, NeferPoseRBFNode.output)
+
+
+class NeferSparseBlendNode(om.MPxNode):
+	typeName = 'neferSparseBlend'
+	typeId = om.MTypeId(0x0007F0C1)
+
+	target = None
+	activeIndex = None
+	activeWeight = None
+	output = None
+
+	def compute(self, plug, dataBlock):
+		if not _isPlug(plug, NeferSparseBlendNode.output) and not (plug.isChild and
+			plug.parent() == NeferSparseBlendNode.output):
+			return None
+
+		active = _readActive(dataBlock, NeferSparseBlendNode.activeIndex,
+			NeferSparseBlendNode.activeWeight)
+
+		# Only the active targets are read
+		targetHandle = dataBlock.inputArrayValue(NeferSparseBlendNode.target)
+		position = [0.0, 0.0, 0.0]
+		for cell, weight in active:
+			try:
+				targetHandle.jumpToLogicalElement(cell)
+			except RuntimeError:
+				continue
+			value = targetHandle.inputValue().asDouble3()
+			for i in range(3):
+				position[i] += weight * value[i]
+
+		outputHandle = dataBlock.outputValue(NeferSparseBlendNode.output)
+		outputHandle.set3Double(*position)
+		outputHandle.setClean()
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferSparseBlendNode()
+
+	@staticmethod
+	def initialize():
+		numericAttr = om.MFnNumericAttribute()
+
+		NeferSparseBlendNode.target = numericAttr.create('target', 't',
+			om.MFnNumericData.k3Double, 0.0)
+		numericAttr.array = True
+		NeferSparseBlendNode.addAttribute(NeferSparseBlendNode.target)
+
+		_addActiveInputs(NeferSparseBlendNode)
+
+		NeferSparseBlendNode.output = numericAttr.create('output', 'out',
+			om.MFnNumericData.k3Double, 0.0)
+		numericAttr.writable = False
+		numericAttr.storable = False
+		NeferSparseBlendNode.addAttribute(NeferSparseBlendNode.output)
+
+		for attr in (NeferSparseBlendNode.target, NeferSparseBlendNode.activeIndex,
+			NeferSparseBlendNode.activeWeight):
+			NeferSparseBlendNode.attributeAffects(attr, NeferSparseBlendNode.output)
+
+
+class NeferSparseCurveBlendNode(om.MPxNode):
+	typeName = 'neferSparseCurveBlend'
+	typeId = om.MTypeId(0x0007F0C2)
+
+	baseCurve = None
+	targetCurve = None
+	activeIndex = None
+	activeWeight = None
+	outputCurve = None
+
+	def compute(self, plug, dataBlock):
+		if plug != NeferSparseCurveBlendNode.outputCurve:
+			return None
+
+		active = _readActive(dataBlock, NeferSparseCurveBlendNode.activeIndex,
+			NeferSparseCurveBlendNode.activeWeight)
+
+		# The base and the targets are both local space curves
+		baseData = dataBlock.inputValue(NeferSparseCurveBlendNode.baseCurve).asNurbsCurve()
+		outputData = om.MFnNurbsCurveData().create()
+		outputCurve = om.MFnNurbsCurve().copy(baseData, outputData)
+		basePoints = outputCurve.cvPositions()
+
+		# Same as a blend shape: base + sum(weight * (target - base))
+		points = [om.MPoint(point) for point in basePoints]
+		targetHandle = dataBlock.inputArrayValue(NeferSparseCurveBlendNode.targetCurve)
+		for cell, weight in active:
+			try:
+				targetHandle.jumpToLogicalElement(cell)
+			except RuntimeError:
+				continue
+			targetPoints = om.MFnNurbsCurve(targetHandle.inputValue().asNurbsCurve()).cvPositions()
+			for i in range(min(len(points), len(targetPoints))):
+				points[i] += (targetPoints[i] - basePoints[i]) * weight
+		outputCurve.setCVPositions(points)
+
+		outputHandle = dataBlock.outputValue(NeferSparseCurveBlendNode.outputCurve)
+		outputHandle.setMObject(outputData)
+		outputHandle.setClean()
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferSparseCurveBlendNode()
+
+	@staticmethod
+	def initialize():
+		typedAttr = om.MFnTypedAttribute()
+
+		NeferSparseCurveBlendNode.baseCurve = typedAttr.create('baseCurve', 'bc',
+			om.MFnData.kNurbsCurve)
+		NeferSparseCurveBlendNode.addAttribute(NeferSparseCurveBlendNode.baseCurve)
+
+		NeferSparseCurveBlendNode.targetCurve = typedAttr.create('targetCurve', 'tc',
+			om.MFnData.kNurbsCurve)
+		typedAttr.array = True
+		NeferSparseCurveBlendNode.addAttribute(NeferSparseCurveBlendNode.targetCurve)
+
+		_addActiveInputs(NeferSparseCurveBlendNode)
+
+		NeferSparseCurveBlendNode.outputCurve = typedAttr.create('outputCurve', 'oc',
+			om.MFnData.kNurbsCurve)
+		typedAttr.writable = False
+		typedAttr.storable = False
+		NeferSparseCurveBlendNode.addAttribute(NeferSparseCurveBlendNode.outputCurve)
+
+		for attr in (NeferSparseCurveBlendNode.baseCurve, NeferSparseCurveBlendNode.targetCurve,
+			NeferSparseCurveBlendNode.activeIndex, NeferSparseCurveBlendNode.activeWeight):
+			NeferSparseCurveBlendNode.attributeAffects(attr, NeferSparseCurveBlendNode.outputCurve)
+
+
+class NeferPoseSelectorNode(om.MPxNode):
+	typeName = 'neferPoseSelector'
+	typeId = om.MTypeId(0x0007F0C6)
+
+	selector = None
+	numPoses = None
+	autoDisplay = None
+	cellPose = None
+	activeIndex = None
+	activeWeight = None
+	output = None
+
+	def compute(self, plug, dataBlock):
+		if not _isPlug(plug, NeferPoseSelectorNode.output):
+			return None
+		numPoses = dataBlock.inputValue(NeferPoseSelectorNode.numPoses).asInt()
+		if dataBlock.inputValue(NeferPoseSelectorNode.autoDisplay).asBool():
+			# PoseSelector.setAutoDisplay connects the active pairs only in this mode, so
+			# the driver does not dirty the outputs of a solo selector
+			cellPoseData = dataBlock.inputValue(NeferPoseSelectorNode.cellPose).data()
+			cellPose = []
+			if not cellPoseData.isNull():
+				cellPose = list(om.MFnIntArrayData(cellPoseData).array())
+			shown = set()
+			for cell, weight in _readActive(dataBlock, NeferPoseSelectorNode.activeIndex,
+				NeferPoseSelectorNode.activeWeight):
+				shown.add(cellPose[cell] if cell < len(cellPose) else cell)
+		else:
+			shown = set([dataBlock.inputValue(NeferPoseSelectorNode.selector).asInt() - 1])
+
+		outputHandle = dataBlock.outputArrayValue(NeferPoseSelectorNode.output)
+		builder = outputHandle.builder()
+		for i in range(numPoses):
+			builder.addElement(i).setBool(i in shown)
+		outputHandle.set(builder)
+		outputHandle.setAllClean()
+		dataBlock.setClean(plug)
+
+	@staticmethod
+	def creator():
+		return NeferPoseSelectorNode()
+
+	@staticmethod
+	def initialize():
+		numericAttr = om.MFnNumericAttribute()
+
+		NeferPoseSelectorNode.selector = numericAttr.create('selector', 'sel',
+			om.MFnNumericData.kInt, 0)
+		numericAttr.setMin(0)
+		numericAttr.keyable = True
+		NeferPoseSelectorNode.addAttribute(NeferPoseSelectorNode.selector)
+
+		NeferPoseSelectorNode.numPoses = numericAttr.create('numPoses', 'np',
+			om.MFnNumericData.kInt, 0)
+		NeferPoseSelectorNode.addAttribute(NeferPoseSelectorNode.numPoses)
+
+		NeferPoseSelectorNode.autoDisplay = numericAttr.create('autoDisplay', 'ad',
+			om.MFnNumericData.kBoolean, False)
+		numericAttr.keyable = True
+		NeferPoseSelectorNode.addAttribute(NeferPoseSelectorNode.autoDisplay)
+
+		typedAttr = om.MFnTypedAttribute()
+		NeferPoseSelectorNode.cellPose = typedAttr.create('cellPose', 'cp', om.MFnData.kIntArray)
+		NeferPoseSelectorNode.addAttribute(NeferPoseSelectorNode.cellPose)
+
+		_addActiveInputs(NeferPoseSelectorNode)
+
+		NeferPoseSelectorNode.output, = _addArrayOutputs(NeferPoseSelectorNode, (
+			('output', 'out', om.MFnNumericData.kBoolean), ))
+		for attr in (NeferPoseSelectorNode.selector, NeferPoseSelectorNode.numPoses,
+			NeferPoseSelectorNode.autoDisplay, NeferPoseSelectorNode.cellPose,
+			NeferPoseSelectorNode.activeIndex, NeferPoseSelectorNode.activeWeight):
+			NeferPoseSelectorNode.attributeAffects(attr, NeferPoseSelectorNode.output)
+
+
+class NeferSetBoolsCmd(om.MPxCommand):
+	commandName = 'neferSetBools'
+
+	def __init__(self):
+		om.MPxCommand.__init__(self)
+		self.modifier = om.MDGModifier()
+
+	def doIt(self, args):
+		selList = om.MSelectionList()
+		for i in range(0, len(args), 2):
+			selList.add(args.asString(i))
+		for k, i in enumerate(range(0, len(args), 2)):
+			self.modifier.newPlugValueBool(selList.getPlug(k), args.asBool(i + 1))
+		self.modifier.doIt()
+
+	def redoIt(self):
+		self.modifier.doIt()
+
+	def undoIt(self):
+		self.modifier.undoIt()
+
+	def isUndoable(self):
+		return True
+
+	@staticmethod
+	def creator():
+		return NeferSetBoolsCmd()
+
+
+nodeClasses = (NeferPoseGridNode, NeferSwingTwistNode, NeferPoseGridViewNode,
+	NeferPoseRBFNode, NeferSparseBlendNode, NeferSparseCurveBlendNode, NeferPoseSelectorNode)
+
+
+def initializePlugin(mObj):
+	plugin = om.MFnPlugin(mObj, 'Skin+Bones', '1.0')
+	for nodeClass in nodeClasses:
+		plugin.registerNode(nodeClass.typeName, nodeClass.typeId, nodeClass.creator,
+			nodeClass.initialize)
+	plugin.registerCommand(NeferSetBoolsCmd.commandName, NeferSetBoolsCmd.creator)
+
+
+def uninitializePlugin(mObj):
+	plugin = om.MFnPlugin(mObj)
+	for nodeClass in nodeClasses:
+		plugin.deregisterNode(nodeClass.typeId)
+	plugin.deregisterCommand(NeferSetBoolsCmd.commandName)
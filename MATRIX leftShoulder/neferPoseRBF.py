@@ -0,0 +1,127 @@
+# neferPoseRBF.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Radial basis function pose weights in pure Python. An alternative to the pose grid: the
+poses are scattered samples (any longitude, latitude, twist) instead of every cell of a
+tensor product grid.
+
+	weight(pose j) = sum(kernel(|x - sample i|) * B[i][j]) + B[n][j]
+
+kernel is a Gaussian. B is solved once from the samples (the kernel matrix with a constant
+term, so the weights sum to 1 and each sample pose gets weight 1 at its own sample). Each
+evaluation is then n kernel values and one (n + 1) x n product.
+
+	rbf = PoseRBF((('x0_y0_w0', (0, 0, 0)), ('x90_y90_w0', (90, 90, 0)), ...))
+	rbf.weights((30, 60, 0))
+'''
+
+import math
+
+
+def _solve(matrix, columns):
+	'''Solve matrix * X = columns with Gaussian elimination and partial pivoting. columns is
+	a list of right hand side rows. Returns X as a list of rows.'''
+	n = len(matrix)
+	a = [list(row) + list(rhs) for row, rhs in zip(matrix, columns)]
+	for k in range(n):
+		pivot = max(range(k, n), key=lambda i: abs(a[i][k]))
+		if abs(a[pivot][k]) < 1e-12:
+			raise ValueError('Pose samples give a singular kernel matrix (duplicate samples?)')
+		a[k], a[pivot] = a[pivot], a[k]
+		rowK = a[k]
+		for i in range(k + 1, n):
+			factor = a[i][k] / rowK[k]
+			if factor:
+				row = a[i]
+				for j in range(k, len(row)):
+					row[j] -= factor * rowK[j]
+	x = [None] * n
+	for k in range(n - 1, -1, -1):
+		row = a[k]
+		x[k] = [(row[n + j] - sum(row[i] * x[i][j] for i in range(k + 1, n))) / row[k]
+			for j in range(len(row) - n)]
+	return x
+
+
+class PoseRBF():
+	'''Scattered pose samples as (name, axis values) pairs. scales multiplies each axis
+	before distances are taken (e.g. to make 1 degree of twist count less than 1 degree of
+	latitude). width is the Gaussian radius in scaled units, by default the mean distance
+	from a sample to its nearest sample.'''
+	def __init__(self, samples, scales=None, width=None):
+		self.names = [sample[0] for sample in samples]
+		numAxes = len(samples[0][1])
+		self.scales = [float(scale) for scale in (scales or [1.0] * numAxes)]
+		self.points = [self.scaled(sample[1]) for sample in samples]
+		self.numCells = len(self.points)
+		self.width = float(width or self.meanSpacing())
+		self.factor()
+
+	def scaled(self, values):
+		return [value * scale for value, scale in zip(values, self.scales)]
+
+	def meanSpacing(self):
+		if len(self.points) < 2:
+			return 1.0
+		total = 0.0
+		for i, point in enumerate(self.points):
+			total += min(self.distance(point, other)
+				for j, other in enumerate(self.points) if j != i)
+		return total / len(self.points)
+
+	def distance(self, a, b):
+		return math.sqrt(sum((p - q) ** 2 for p, q in zip(a, b)))
+
+	def kernel(self, distance):
+		r = distance / self.width
+		return math.exp(-r * r)
+
+	def factor(self):
+		'''Solve the kernel matrix once. Row i of self.basis is the contribution of kernel
+		value i to every pose weight. The last row is the constant term.'''
+		n = self.numCells
+		matrix = [[self.kernel(self.distance(p, q)) for q in self.points] + [1.0]
+			for p in self.points]
+		matrix.append([1.0] * n + [0.0])
+		identity = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)] + [[0.0] * n]
+		# The matrix is symmetric, so the rows of its inverse give the weights
+		self.basis = _solve(matrix, identity)
+
+	def cellNames(self):
+		return list(self.names)
+
+	def weights(self, values):
+		'''Return the weights of all the poses for the axis values. They sum to 1 but can be
+		negative between far apart samples.'''
+		point = self.scaled(values)
+		phi = [self.kernel(self.distance(point, sample)) for sample in self.points] + [1.0]
+		weights = [0.0] * self.numCells
+		for phiI, row in zip(phi, self.basis):
+			if phiI > 1e-12:
+				for j, b in enumerate(row):
+					weights[j] += phiI * b
+		return weights
+
+	def sparseWeights(self, values):
+		return [(cell, weight) for cell, weight in enumerate(self.weights(values)) if weight]
+
+
+def farthestSamples(candidates, count, first=None, scales=None):
+	'''Pick count samples from the (name, axis values) candidates that are spread out: each
+	new sample is the candidate farthest from the samples picked so far. Use to choose the
+	poses to author from the cells of a pose grid.'''
+	scales = scales or [1.0] * len(candidates[0][1])
+	points = [[value * scale for value, scale in zip(candidate[1], scales)]
+		for candidate in candidates]
+	names = [candidate[0] for candidate in candidates]
+	picked = [names.index(first) if first else 0]
+	nearest = [math.sqrt(sum((p - q) ** 2 for p, q in zip(point, points[picked[0]])))
+		for point in points]
+	while len(picked) < min(count, len(candidates)):
+		index = max(range(len(points)), key=lambda i: nearest[i])
+		picked.append(index)
+		for i, point in enumerate(points):
+			nearest[i] = min(nearest[i],
+				math.sqrt(sum((p - q) ** 2 for p, q in zip(point, points[index]))))
+	return [candidates[i] for i in picked]
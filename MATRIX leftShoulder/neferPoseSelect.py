@@ -0,0 +1,261 @@
+# neferPoseSelect.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Solo pose visibility through one selector. Replaces the bool attribute per pose on every
+<muscle>_pose_grp (addPoseVisibilityCtrl2.py) and the control1 visibility fan out
+(poseVisibility.py).
+
+1. A neferPoseSelector node with an activePose enum: none, x0_y0_w0, x0_y0_w45, ...
+2. Output i of the node drives the visibility of the pose i cell group of each muscle. One
+   selector can serve one muscle or the whole rig.
+3. Showing a pose is one setAttr: PoseSelector.show('x90_y45_w0').
+4. With a driver set, PoseSelector.setAutoDisplay() shows only the poses of the active
+   driver cells (the up to 8 corners with a non-zero weight) and follows the arm. This
+   replaces wiring N3_muscleDriver1 into the L_shoulder_pose_ctrl bools
+   (neferMusclePoseCtrlAuto.py, poseVisibilityAddition.py). Hidden targets are not drawn.
+   The driver's active pairs are only connected while auto display is on, so in solo mode
+   moving the arm does not dirty the selector outputs and the cell group visibilities.
+
+removeVisAttrs deletes the old bool attributes once the selector is connected.
+
+togglePoses replaces poseVisibilityButton2.py: it flips the poses enabled on
+L_shoulder_pose_ctrl for every selected muscle with one read and one undo chunk.
+'''
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+from neferPoseGrid import cellNames
+from neferPoseGridDriver import loadPlugin, PoseGridDriver
+from neferRegistry import lookupName, existingNames
+
+
+def cellGrp(muscleName, pose):
+	'The cell group of a pose.'
+	return lookupName(muscleName, 'cellGrp', 0, pose, '%s_%s_grp' % (muscleName, pose))
+
+
+class PoseSelector():
+	'''A neferPoseSelector node for the poses in poseList.'''
+	def __init__(self, name, poseList):
+		self.name = name
+		self.poseList = list(poseList)
+
+	def create(self):
+		loadPlugin()
+		mc.createNode('neferPoseSelector', name=self.name)
+		mc.setAttr('%s.numPoses' % self.name, len(self.poseList))
+		# Enum index 0 is none, index i + 1 is pose i: the same numbering as selector
+		mc.addAttr(self.name, longName='activePose', attributeType='enum',
+			enumName=':'.join(['none'] + self.poseList), keyable=True)
+		mc.connectAttr('%s.activePose' % self.name, '%s.selector' % self.name)
+		return self.name
+
+	def poseGrp(self, muscleName, pose):
+		return cellGrp(muscleName, pose)
+
+	def connect(self, muscleList):
+		'''Drive the cell group visibility of each muscle. Poses a muscle does not have are
+		skipped. Returns the number of connections made.'''
+		numConnected = 0
+		for muscleName in muscleList:
+			poseGrps = [self.poseGrp(muscleName, pose) for pose in self.poseList]
+			existing = set(existingNames(poseGrps))
+			for i, poseGrp in enumerate(poseGrps):
+				if poseGrp in existing:
+					mc.connectAttr('%s.output[%s]' % (self.name, i), '%s.visibility' % poseGrp,
+						force=True)
+					numConnected += 1
+		return numConnected
+
+	def show(self, pose=None):
+		'Show one pose on every connected muscle, or none. Leaves auto display.'
+		index = self.poseList.index(pose) + 1 if pose else 0
+		self.setAutoDisplay(False)
+		mc.setAttr('%s.activePose' % self.name, index)
+
+	def setDriver(self, driver):
+		'''Use the active cell pairs of a PoseGridDriver or PoseGridDriverView for auto
+		display. Driver cells that are not in poseList are never shown. The driver is stored
+		on the selector node, so auto display can be switched after the scene is reopened.'''
+		cellPose = [self.poseList.index(cellName) if cellName in self.poseList else -1
+			for cellName in driver.cellNames]
+		mc.setAttr('%s.cellPose' % self.name, cellPose, type='Int32Array')
+		if not mc.attributeQuery('activeSource', node=self.name, exists=True):
+			mc.addAttr(self.name, longName='activeSource', dataType='string')
+			mc.addAttr(self.name, longName='numActive', attributeType='long')
+		prefix = 'outActive' if mc.nodeType(driver.name) == 'neferPoseGridView' else 'active'
+		mc.setAttr('%s.activeSource' % self.name, '%s.%s' % (driver.name, prefix), type='string')
+		mc.setAttr('%s.numActive' % self.name, driver.grid.numActive())
+		if mc.getAttr('%s.autoDisplay' % self.name):
+			self.setAutoDisplay(True)
+
+	def setAutoDisplay(self, on=True):
+		'''Show the poses of the active driver cells, updated as the arm moves, or go back
+		to solo mode. The active pairs of the driver are connected while auto display is on
+		and disconnected when it is off.'''
+		pairs = []
+		for attr in ('activeIndex', 'activeWeight'):
+			pairs.extend(mc.listConnections('%s.%s' % (self.name, attr), source=True,
+				destination=False, connections=True, plugs=True) or [])
+		for i in range(0, len(pairs), 2):
+			mc.disconnectAttr(pairs[i + 1], pairs[i])
+		if on:
+			if not mc.attributeQuery('activeSource', node=self.name, exists=True):
+				raise RuntimeError('%s has no driver, call setDriver first' % self.name)
+			source = mc.getAttr('%s.activeSource' % self.name)
+			for k in range(mc.getAttr('%s.numActive' % self.name)):
+				for attr in ('Index', 'Weight'):
+					mc.connectAttr('%s%s[%s]' % (source, attr, k),
+						'%s.active%s[%s]' % (self.name, attr, k))
+		mc.setAttr('%s.autoDisplay' % self.name, on)
+
+
+def removeVisAttrs(muscleList, poseList):
+	'''Delete the pose bool attributes added by addPoseVisibilityCtrl2.addVisAttr from the
+	<muscle>_pose_grp groups. Their connections go with them. Returns the number removed.'''
+	plugList = ['%s_pose_grp.%s' % (muscleName, pose) for muscleName in muscleList
+		for pose in poseList]
+	existing = set(existingNames(plugList))
+	numRemoved = 0
+	mc.undoInfo(openChunk=True)
+	try:
+		for muscleName in muscleList:
+			poseGrp = '%s_pose_grp' % muscleName
+			for pose in poseList:
+				if '%s.%s' % (poseGrp, pose) in existing:
+					mc.deleteAttr(poseGrp, attribute=pose)
+					numRemoved += 1
+	finally:
+		mc.undoInfo(closeChunk=True)
+	return numRemoved
+
+
+def selectedMuscles(nodeList=None):
+	'''Return the muscles of the nodes (the selection by default), in order and without
+	repeats. Nodes tagged in a registry resolve through the registry connection, so any pose
+	group, target or constraint of a muscle selects it. Muscle surfaces resolve by name.'''
+	if nodeList is None:
+		nodeList = mc.ls(selection=True) or []
+	# ['node.message', 'registry', ...]
+	pairs = mc.listConnections(nodeList, source=False, destination=True, type='network',
+		connections=True) or []
+	registries = {}
+	for i in range(0, len(pairs), 2):
+		if pairs[i + 1].endswith('_nefer_registry'):
+			registries.setdefault(pairs[i].split('.')[0], pairs[i + 1][:-len('_nefer_registry')])
+
+	muscleList = []
+	for node in nodeList:
+		muscleName = registries.get(node)
+		if muscleName is None:
+			for prefix in ('cMuscleSurfaceShapeMus_', 'cMuscleSurfaceMus_'):
+				if node.startswith(prefix):
+					muscleName = node[len(prefix):-1]
+			if node.endswith('_pose_grp') and node.find('_control') == -1:
+				muscleName = node[:-len('_pose_grp')]
+		if muscleName and muscleName not in muscleList:
+			muscleList.append(muscleName)
+	return muscleList
+
+
+def _readBools(plugList, skipDriven=False):
+	'''Read the bool plugs with the API, without a getAttr call per plug. Returns
+	{plug: value} for the plugs that exist, without the plugs driven by a connection if
+	skipDriven is set.'''
+	existing = existingNames(plugList)
+	if not existing:
+		return {}
+	selList = om.MSelectionList()
+	for plugName in existing:
+		selList.add(plugName)
+	values = {}
+	plug = om.MPlug()
+	for i, plugName in enumerate(existing):
+		selList.getPlug(i, plug)
+		if not (skipDriven and plug.isDestination()):
+			values[plugName] = plug.asBool()
+	return values
+
+
+def togglePoses(poseList, muscleList=None, ctrlGrp='L_shoulder_pose_ctrl'):
+	'''Flip the visibility of the poses enabled on ctrlGrp for the muscles (the selected
+	muscles by default). Uses the <muscle>_pose_grp pose attribute where the muscle still has
+	one, otherwise the cell group visibility. The poses on ctrlGrp are usually driven by
+	N3_muscleDriver1 and are read as they are; muscle plugs driven by a PoseSelector are
+	left alone. All the flips are one undoable neferSetBools call. Returns the number of plugs
+	flipped.'''
+	if muscleList is None:
+		muscleList = selectedMuscles()
+	enabled = _readBools(['%s.%s' % (ctrlGrp, pose) for pose in poseList])
+	poses = [pose for pose in poseList if enabled.get('%s.%s' % (ctrlGrp, pose))]
+	if not poses or not muscleList:
+		return 0
+
+	attrPlugs = ['%s_pose_grp.%s' % (muscleName, pose) for muscleName in muscleList
+		for pose in poses]
+	visPlugs = ['%s.visibility' % cellGrp(muscleName, pose) for muscleName in muscleList
+		for pose in poses]
+	attrValues = _readBools(attrPlugs, skipDriven=True)
+	visValues = _readBools(visPlugs, skipDriven=True)
+	existingAttrs = set(existingNames(attrPlugs))
+
+	flips = []
+	for attrPlug, visPlug in zip(attrPlugs, visPlugs):
+		if attrPlug in existingAttrs:
+			if attrPlug in attrValues:
+				flips.append((attrPlug, not attrValues[attrPlug]))
+		elif visPlug in visValues:
+			flips.append((visPlug, not visValues[visPlug]))
+
+	if flips:
+		loadPlugin()
+		mc.neferSetBools(*[item for flip in flips for item in flip])
+	return len(flips)
+
+
+def main():
+
+	poseData = (
+		('x0', 'x45', 'x90', 'x135', 'x180', 'xn45'),
+		('y0', 'y45', 'y90', 'y135', 'y170'),
+		('w0', 'w45', 'w90', 'wn45', 'wn90'))
+
+	poseList = cellNames(poseData)
+
+	muscleList = ['L_bicepsBrachiiShort']
+
+	print '%s pose attributes removed' % removeVisAttrs(muscleList, poseList)
+
+	# One selector for the whole rig
+	selector = PoseSelector('N3_poseSelector', poseList)
+	selector.create()
+	print '%s pose groups connected' % selector.connect(muscleList)
+
+	selector.show('x90_y45_w0')
+
+	# Show the targets of the active cells of the shoulder driver as the arm moves
+	driverData = {
+		'driverName'	: 	'N3_poseGridDriver1',
+		'axes'			: 	(
+			('L_humerus_nspace_jnt.longitude',
+				(('x0', 0), ('x45', 45), ('x90', 90), ('x135', 135), ('x180', 180), ('xn45', -45))),
+			('L_humerus_nspace_jnt.latitude',
+				(('y0', 0), ('y45', 45), ('y90', 90), ('y135', 135), ('y170', 170))),
+			('L_arm_ctrl.twist',
+				(('w0', 0), ('w45', 45), ('w90', 90), ('wn45', -45), ('wn90', -90)))),
+		}
+	driver = PoseGridDriver(driverData)
+	if not mc.objExists(driver.name):
+		driver.create()
+	selector.setDriver(driver)
+	selector.setAutoDisplay()
+
+	# Shelf button: flip the poses enabled on L_shoulder_pose_ctrl for the selected muscles
+	# togglePoses(poseList)
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -0,0 +1,368 @@
+# neferPoseStore.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+The pose data of a set of muscles as one array per pose, for tools that work on whole poses
+instead of one translate at a time.
+
+	store = PoseStore([('L_pectoralisA', 6), ...], poseList)
+	store.load()			# Every target read with the API, no getAttr per channel
+	...						# Work on store.values[pose], a flat list of floats
+	store.save(poses)		# One PoseEditSession: one undo chunk, one re-evaluation
+
+The array of a pose holds, for every (muscle, control) in muscleList order, the translate of
+the control target (3 values) and the object space CVs of the cross section target (3 per
+CV). store.slots gives the layout. The translates are in the space of the control pose
+group, which follows the control's AUTO group, so they are offsets from AUTO.
+
+Maya 2013 has no numpy, so the arrays are plain lists and the operations are list
+comprehensions over whole poses.
+
+blendPoses fills destination poses with weighted sums of source poses (shoulderPoseCopy2.py,
+N3pectoralisMajor_wn45.py). The grid operations of neferPoseFill.py return the same blend
+recipes, e.g. a harmonic fill of the cells that were not authored:
+
+	store.save(blendPoses(store, harmonicFill(n3Grid(), authoredPoses(store))))
+
+or the propagation of the x0_y0 twists to every longitude ('N3 bicepsBrachiiShort pose
+copy.py'), read once and written once:
+
+	store.save(blendPoses(store, propagate(n3Grid(), 'long', 'x0',
+		('x45', 'x90', 'x135', 'x180', 'xn45'), within=('y0', ))))
+
+or a smoothing pass over the whole grid with the authored cells pinned:
+
+	store.save(blendPoses(store, smooth(n3Grid(), pinned=authoredPoses(store))))
+
+mirrorPoses copies the poses of L_ muscles to their R_ muscles, mirrored in rig space. The
+R_ pose systems must already be built (same controls, cross sections and CV counts), and
+the rig must be in its bind pose, since the frames are read from the scene.
+
+checkPoses flags broken cells (see neferPoseFill.findJumps) before a render:
+
+	print checkPoses([('L_pectoralisA', 6), ...]).report()
+'''
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+from neferPoseEdit import PoseEditSession
+from neferPoseFill import harmonicFill, propagate, smooth, mirrorCells, findJumps
+from neferPoseGrid import n3Grid
+from neferRegistry import lookupName, existingNames
+
+
+class PoseStore():
+	'''The control and cross section targets of the muscles in muscleList, a list of (muscle
+	name, number of controls), for the poses in poseList.'''
+	def __init__(self, muscleList, poseList, crossSections=True):
+		self.muscleList = list(muscleList)
+		self.poseList = list(poseList)
+		self.crossSections = crossSections
+		self.slots = []			# [(muscle name, control number, kind, offset, size)]
+		self.values = {}		# {pose: [float, ...]}, only the poses that exist
+		self.missing = {}		# {pose: [target, ...]}, the poses left out of values
+		self.size = 0
+
+	def targetName(self, muscleName, cNum, kind, pose):
+		'The target of a control or cross section.'
+		if kind == 'control':
+			return lookupName(muscleName, 'ctrlTarget', cNum, pose,
+				'%s_control%s_%s_target' % (muscleName, cNum, pose))
+		return lookupName(muscleName, 'crossTarget', cNum, pose,
+			'%s_crossSection%s_%s_target' % (muscleName, cNum, pose))
+
+	def targets(self, pose):
+		'Return the (kind, target) of every slot of the pose, in slot order.'
+		kinds = ('control', 'cross') if self.crossSections else ('control', )
+		return [(kind, self.targetName(muscleName, cNum, kind, pose))
+			for muscleName, numCtrls in self.muscleList for cNum in range(1, numCtrls + 1)
+			for kind in kinds]
+
+	def load(self):
+		'''Read every target of every pose. Poses with a missing target are left out of
+		values. Returns the number of poses loaded.'''
+		targetLists = dict((pose, self.targets(pose)) for pose in self.poseList)
+		existing = set(existingNames([target for pose in self.poseList
+			for kind, target in targetLists[pose]]))
+
+		self.values = {}
+		self.slots = []
+		self.missing = {}
+		for pose in self.poseList:
+			missing = [target for kind, target in targetLists[pose] if target not in existing]
+			if missing:
+				self.missing[pose] = missing
+		poses = [pose for pose in self.poseList if pose not in self.missing]
+		allArrays = _readTargets([pair for pose in poses for pair in targetLists[pose]])
+		sizes = None
+		for p, pose in enumerate(poses):
+			numSlots = len(targetLists[pose])
+			arrays = allArrays[p * numSlots:(p + 1) * numSlots]
+			if sizes is None:
+				sizes = [len(array) for array in arrays]
+				self.makeSlots(sizes)
+			elif [len(array) for array in arrays] != sizes:
+				raise ValueError('The targets of %s do not have the same number of CVs as the '
+					'other poses' % pose)
+			self.values[pose] = [value for array in arrays for value in array]
+		return len(self.values)
+
+	def makeSlots(self, sizes):
+		kinds = ('control', 'cross') if self.crossSections else ('control', )
+		keys = [(muscleName, cNum, kind) for muscleName, numCtrls in self.muscleList
+			for cNum in range(1, numCtrls + 1) for kind in kinds]
+		offset = 0
+		for key, size in zip(keys, sizes):
+			self.slots.append(key + (offset, size))
+			offset += size
+		self.size = offset
+
+	def save(self, poses=None):
+		'''Write the poses (all the loaded poses by default) back to their targets in one
+		batch. Raises ValueError before anything is written if a target does not exist.
+		Returns the number of targets written.'''
+		if poses is None:
+			poses = self.poseList
+		writes = [(kind, target, self.values[pose][slot[3]:slot[3] + slot[4]])
+			for pose in poses if pose in self.values
+			for (kind, target), slot in zip(self.targets(pose), self.slots)]
+		existing = set(existingNames([target for kind, target, array in writes]))
+		missing = [target for kind, target, array in writes if target not in existing]
+		if missing:
+			raise ValueError('%s targets do not exist, e.g. %s' % (len(missing), missing[0]))
+
+		session = PoseEditSession(self.muscleList)
+		session.begin()
+		try:
+			for kind, target, array in writes:
+				if kind == 'control':
+					session.setTranslate(target, array)
+				else:
+					session.setCVs(target, zip(array[0::3], array[1::3], array[2::3]))
+		except Exception:
+			session.cancel()
+			raise
+		return session.commit()
+
+
+def _readTargets(targetList):
+	'''Read the (kind, target) pairs with the API: the translate of a control target or the
+	object space CVs of a cross section target, each as a flat list.'''
+	selList = om.MSelectionList()
+	for kind, target in targetList:
+		selList.add(target)
+	arrays = []
+	points = om.MPointArray()
+	for i, (kind, target) in enumerate(targetList):
+		dagPath = om.MDagPath()
+		selList.getDagPath(i, dagPath)
+		if kind == 'control':
+			translate = om.MFnTransform(dagPath).getTranslation(om.MSpace.kTransform)
+			arrays.append([translate.x, translate.y, translate.z])
+			continue
+		dagPath.extendToShape()
+		om.MFnNurbsCurve(dagPath).getCVs(points, om.MSpace.kObject)
+		values = []
+		for j in range(points.length()):
+			point = points[j]
+			values.extend((point.x, point.y, point.z))
+		arrays.append(values)
+	return arrays
+
+
+def blendPoses(store, recipes):
+	'''Fill destination poses with weighted sums of source poses, for every channel of the
+	store at once. recipes is a list of (destination pose, ((source pose, weight), ...)).
+	Every recipe reads the poses as they were before the call, so a pose can be both a
+	source and a destination. Destinations must be poses of the store whose targets exist.
+	Returns the destination poses filled.'''
+	results = []
+	for destPose, sources in recipes:
+		if destPose not in store.poseList:
+			raise ValueError('Destination pose %s is not in the pose list' % destPose)
+		if destPose in store.missing:
+			raise ValueError('Destination pose %s has missing targets, e.g. %s' % (destPose,
+				store.missing[destPose][0]))
+		for pose, weight in sources:
+			if pose not in store.values:
+				raise ValueError('Source pose %s is not loaded' % pose)
+		arrays = [store.values[pose] for pose, weight in sources]
+		weights = [weight for pose, weight in sources]
+		results.append((destPose, [sum(w * v for w, v in zip(weights, column))
+			for column in zip(*arrays)]))
+	for destPose, values in results:
+		store.values[destPose] = values
+	return [destPose for destPose, values in results]
+
+
+def authoredPoses(store, tolerance=1e-4):
+	'''Return the loaded poses that have been edited: a control target moved off its AUTO
+	position by more than tolerance. Poses whose only edits are to cross sections are not
+	found; pass those to harmonicFill by name.'''
+	controls = [offset + i for muscleName, cNum, kind, offset, size in store.slots
+		if kind == 'control' for i in range(size)]
+	return [pose for pose in store.poseList if pose in store.values and
+		[i for i in controls if abs(store.values[pose][i]) > tolerance]]
+
+
+def rightMuscleList(muscleList):
+	'The (muscle name, number of controls) of the R_ muscles of L_ muscles.'
+	return [('R_' + muscleName[2:] if muscleName.startswith('L_') else muscleName, numCtrls)
+		for muscleName, numCtrls in muscleList]
+
+
+def _frameNode(muscleName, cNum, kind):
+	'''The node whose world orientation is the space of a slot's values: the AUTO group for a
+	control target translate, the cross section for the CVs of a cross section target.'''
+	if kind == 'control':
+		return 'grpiControlMidMus_%s%sAUTO1' % (muscleName, cNum)
+	return 'iControlMidMus_%s%s1_crossSectionREST' % (muscleName, cNum)
+
+
+def _linearPart(node):
+	matrix = mc.xform(node, query=True, matrix=True, worldSpace=True)
+	return [matrix[0:3], matrix[4:7], matrix[8:11]]
+
+
+def _inverse3(m):
+	cofactors = [[m[(i + 1) % 3][(j + 1) % 3] * m[(i + 2) % 3][(j + 2) % 3] -
+		m[(i + 1) % 3][(j + 2) % 3] * m[(i + 2) % 3][(j + 1) % 3] for j in range(3)]
+		for i in range(3)]
+	determinant = sum(m[0][j] * cofactors[0][j] for j in range(3))
+	return [[cofactors[j][i] / determinant for j in range(3)] for i in range(3)]
+
+
+def mirrorMap(leftNode, rightNode, axis=0):
+	'''Return the 3x3 matrix that maps a vector in the space of leftNode to its mirror image
+	across the rig's axis (0 for YZ) in the space of rightNode, for row vectors like Maya
+	matrices: local left * left world * mirror * inverse right world.'''
+	left = _linearPart(leftNode)
+	for row in left:
+		row[axis] = -row[axis]
+	rightInverse = _inverse3(_linearPart(rightNode))
+	return [[sum(row[k] * rightInverse[k][j] for k in range(3)) for j in range(3)]
+		for row in left]
+
+
+def checkBindPose():
+	'''Raise ValueError unless every joint of the bind poses (dagPose nodes) of the scene is
+	at its bind pose.'''
+	bindPoses = mc.dagPose(query=True, bindPose=True) or []
+	if not bindPoses:
+		raise ValueError('The scene has no bind pose to check the rig against')
+	for bindPose in bindPoses:
+		moved = mc.dagPose(bindPose, query=True, atPose=True) or []
+		if moved:
+			raise ValueError('The rig is not in its bind pose: %s joints moved, e.g. %s' % (
+				len(moved), moved[0]))
+
+
+def mirrorPoses(leftStore, rightStore, cellMap=None, axis=0, checkRest=True):
+	'''Set the poses of rightStore (the R_ muscles) to the mirror images of the poses of
+	leftStore. cellMap maps the left cells to the right cells (see neferPoseFill.mirrorCells),
+	by default the same names. The mirror is taken in the rest pose of the rig: each slot
+	gets one matrix from its left and right frame nodes. The frames are read from the scene,
+	so the rig is checked to be in its bind pose first (see checkBindPose) unless checkRest is
+	off. Returns the right poses set.'''
+	if [slot[4] for slot in leftStore.slots] != [slot[4] for slot in rightStore.slots]:
+		raise ValueError('The right muscles do not have the same controls and CVs as the left')
+	if checkRest:
+		checkBindPose()
+	maps = [mirrorMap(_frameNode(left[0], left[1], left[2]), _frameNode(right[0], right[1],
+		right[2]), axis) for left, right in zip(leftStore.slots, rightStore.slots)]
+	mirrored = []
+	for pose, values in leftStore.values.items():
+		rightPose = cellMap[pose] if cellMap else pose
+		if rightPose not in rightStore.values:
+			continue
+		rightValues = []
+		for m, slot in zip(maps, leftStore.slots):
+			for i in range(slot[3], slot[3] + slot[4], 3):
+				x, y, z = values[i:i + 3]
+				rightValues.extend([x * m[0][j] + y * m[1][j] + z * m[2][j] for j in range(3)])
+		rightStore.values[rightPose] = rightValues
+		mirrored.append(rightPose)
+	return mirrored
+
+
+def checkPoses(muscleList, grid=None, threshold=3.5, minJump=0.01):
+	'''Load the poses of the muscles and return the JumpReport of their controls and cross
+	sections over the grid (n3Grid by default).'''
+	grid = grid or n3Grid()
+	store = PoseStore(muscleList, grid.cellNames())
+	store.load()
+	return findJumps(grid, store.values, store.slots, threshold, minJump)
+
+
+def main():
+
+	muscleList = [
+		('L_pectoralisA', 6),
+		('L_pectoralisB', 6),
+		('L_pectoralisC', 6),
+		('L_pectoralisD', 6),
+		('L_pectoralisE', 6),
+		('L_pectoralisF', 6),
+		('L_pectoralisG', 6),
+		('L_pectoralisH', 6),
+		('L_pectoralisJ', 6),
+		('L_pectoralisK', 7),
+		('L_pectoralisL', 7),
+		('L_pectoralisM', 7)
+		]
+
+	# The wn45 twists as the average of w0 and wn90, as in shoulderPoseCopy2.py and
+	# N3pectoralisMajor_wn45.py, with the cross sections as well as the controls
+	recipes = [
+		('x90_y0_wn45', (('x90_y0_w0', 0.5), ('x90_y0_wn90', 0.5))),
+		('x90_y90_wn45', (('x90_y90_w0', 0.5), ('x90_y90_wn90', 0.5)))
+		]
+	poseList = set([recipe[0] for recipe in recipes] +
+		[pose for recipe in recipes for pose, weight in recipe[1]])
+
+	store = PoseStore(muscleList, poseList)
+	store.load()
+	print '%s targets written' % store.save(blendPoses(store, recipes))
+
+	# Fill every cell that was not authored from the authored cells
+	# grid = n3Grid()
+	# store = PoseStore(muscleList, grid.cellNames())
+	# store.load()
+	# recipes = harmonicFill(grid, authoredPoses(store))
+	# print '%s targets written for %s filled poses' % (store.save(blendPoses(store, recipes)),
+	# 	len(recipes))
+
+	# Copy the x0_y0_w90 and x0_y0_wn90 poses of the biceps to every longitude
+	# grid = n3Grid()
+	# store = PoseStore([('L_bicepsBrachiiShort', 7)], grid.cellNames())
+	# store.load()
+	# recipes = []
+	# for twist in ('w90', 'wn90'):
+	# 	recipes.extend(propagate(grid, 'long', 'x0', ('x45', 'x90', 'x135', 'x180', 'xn45'),
+	# 		within=('y0', twist)))
+	# store.save(blendPoses(store, recipes))
+
+	# Smooth the bumps out of the hand edited cells, twist only, keeping x90_y90_w0
+	# grid = n3Grid()
+	# store = PoseStore(muscleList, grid.cellNames())
+	# store.load()
+	# store.save(blendPoses(store, smooth(grid, (0.25, 0.5, 0.25), axes=('twist', ),
+	# 	pinned=('x90_y90_w0', ))))
+
+	# Check the pectoralis for broken cells, one muscle at a time so the report names them
+	# for muscleData in muscleList:
+	# 	print muscleData[0], checkPoses([muscleData]).report(5)
+
+	# Mirror the pectoralis to the right side. The right twist runs the other way.
+	# grid = n3Grid()
+	# leftStore = PoseStore(muscleList, grid.cellNames())
+	# rightStore = PoseStore(rightMuscleList(muscleList), grid.cellNames())
+	# leftStore.load()
+	# rightStore.load()
+	# rightStore.save(mirrorPoses(leftStore, rightStore, mirrorCells(grid, ('twist', ))))
+
+
+if __name__ == '__main__':
+	main()
+	print '\r\rScript completed successfully\r\r'
@@ -0,0 +1,255 @@
+# neferRegistry.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Registry of the nodes a neferMuscle pose system creates.
+
+Each muscle gets a network node, <muscleName>_nefer_registry. Every pose group, target,
+constraint and blend shape node of the muscle is connected to it by message and tagged
+with its control number, pose cell and role. Teardown of a slice of the pose system (one
+muscle, one control, one latitude row, one twist column) is then a lookup in the tag index
+and a single delete, without scene wide wildcard searches.
+
+lookup() maps (role, control number, pose) to the node with a dictionary lookup. The nodes
+are held by MObjectHandle, so lookups return the current name after a rename instead of
+rebuilding names like '%s_control%s_%s_target' at every call site. Get registries only
+through getRegistry() (create=True for a new muscle), so every script shares one loaded
+registry per muscle.
+
+Roles:
+	poseGrp				<muscle>_pose_grp
+	cellGrp				pose group of a (partial) pose cell, e.g. <muscle>_x90_y45_grp
+	ctrlPoseGrp			pose group of one control
+	ctrlTarget			<muscle>_control<N>_<pose>_target
+	crossTarget			<muscle>_crossSection<N>_<pose>_target
+	pointConstraint		point constraint of a Maya Muscle control
+	blendShape			blend shape node of a Maya Muscle cross section
+'''
+
+import json
+from collections import namedtuple
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+from neferPoseGrid import cellNames
+
+Entry = namedtuple('Entry', ['index', 'node', 'ctrlNum', 'pose', 'role'])
+
+
+def existingNames(names):
+	'''Return the node or plug names that exist, in order, with one ls call instead of an
+	objExists per name.'''
+	found = set(mc.ls(names) or [])
+	return [name for name in names if name in found]
+
+
+def _objectHandle(node):
+	'Return an MObjectHandle for the node name.'
+	selList = om.MSelectionList()
+	selList.add(node)
+	mObj = om.MObject()
+	selList.getDependNode(0, mObj)
+	return om.MObjectHandle(mObj)
+
+
+def _nodeName(handle):
+	'Return the current (shortest unique) name of the node held by handle.'
+	mObj = handle.object()
+	if mObj.hasFn(om.MFn.kDagNode):
+		return om.MFnDagNode(mObj).partialPathName()
+	return om.MFnDependencyNode(mObj).name()
+
+
+class NeferRegistry():
+	'''The registry node of a neferMuscle.'''
+	def __init__(self, muscleName):
+		self.muscleName = muscleName
+		self.name = '%s_nefer_registry' % muscleName
+		self.tags = {}			# {index: [ctrlNum, pose, role]}
+		self.nodes = {}			# {index: node}
+		self.handles = {}		# {index: MObjectHandle}
+		self.nextIndex = 0
+		if mc.objExists(self.name):
+			self.load()
+		else:
+			self.create()
+		self.handle = _objectHandle(self.name)
+
+	def create(self):
+		mc.createNode('network', name=self.name)
+		mc.addAttr(self.name, longName='muscleName', dataType='string')
+		mc.setAttr('%s.muscleName' % self.name, self.muscleName, type='string')
+		mc.addAttr(self.name, longName='entries', attributeType='message', multi=True)
+		mc.addAttr(self.name, longName='tags', dataType='string')
+		self.save()
+		self.buildIndex()
+
+	def load(self):
+		'''Read the tags and the connected nodes. Tags whose node has been deleted are
+		dropped.'''
+		tagData = mc.getAttr('%s.tags' % self.name) or '[]'
+		tags = dict((row[0], row[1:]) for row in json.loads(tagData))
+
+		# ['registry.entries[i]', 'node', ...]
+		pairs = mc.listConnections('%s.entries' % self.name, source=True, destination=False,
+			connections=True) or []
+		self.nodes = {}
+		self.handles = {}
+		for i in range(0, len(pairs), 2):
+			plug = pairs[i]
+			index = int(plug[plug.rindex('[') + 1:-1])
+			self.nodes[index] = pairs[i + 1]
+			self.handles[index] = _objectHandle(pairs[i + 1])
+
+		self.tags = dict((index, tags[index]) for index in self.nodes if index in tags)
+		self.nextIndex = max(tags.keys() + self.nodes.keys() + [-1]) + 1
+		self.buildIndex()
+
+	def save(self):
+		'''Write the tags to the registry node. Call once after tagging a batch of nodes.'''
+		rows = [[index] + self.tags[index] for index in sorted(self.tags)]
+		mc.setAttr('%s.tags' % self.name, json.dumps(rows), type='string')
+
+	def buildIndex(self):
+		'Index the entries by role, control number, axis point and full key.'
+		self.byRole = {}
+		self.byCtrl = {}
+		self.byPoint = {}
+		self.byKey = {}
+		for index in self.tags:
+			self.indexEntry(index)
+
+	def indexEntry(self, index):
+		ctrlNum, pose, role = self.tags[index]
+		self.byRole.setdefault(role, set()).add(index)
+		self.byCtrl.setdefault(ctrlNum, set()).add(index)
+		for point in pose.split('_') if pose else []:
+			self.byPoint.setdefault(point, set()).add(index)
+		self.byKey[(role, ctrlNum, pose)] = index
+
+	def tag(self, node, role, ctrlNum=0, pose=''):
+		'''Connect node to the registry and tag it. The tags are written by save().'''
+		index = self.nextIndex
+		self.nextIndex += 1
+		mc.connectAttr('%s.message' % node, '%s.entries[%s]' % (self.name, index))
+		self.tags[index] = [ctrlNum, pose, role]
+		self.nodes[index] = node
+		self.handles[index] = _objectHandle(node)
+		self.indexEntry(index)
+		return index
+
+	def lookup(self, role, ctrlNum=0, pose=''):
+		'''Return the current name of the node tagged (role, ctrlNum, pose). Returns None if
+		there is no such node or it has been deleted.'''
+		index = self.byKey.get((role, ctrlNum, pose))
+		if index is None or not self.handles[index].isValid():
+			return None
+		return _nodeName(self.handles[index])
+
+	def select(self, role=None, ctrlNum=None, points=(), anyPoints=()):
+		'''Return the entries matching all the given tags. points is a list of axis points
+		that must all be part of the pose cell, e.g. ['y45'] for a latitude row or
+		['x90', 'y170'] for a twist column. anyPoints is a list of axis points of which at
+		least one must be part of the pose cell.'''
+		indexSet = set(self.tags)
+		if role is not None:
+			indexSet &= self.byRole.get(role, set())
+		if ctrlNum is not None:
+			indexSet &= self.byCtrl.get(ctrlNum, set())
+		for point in points:
+			indexSet &= self.byPoint.get(point, set())
+		if anyPoints:
+			anySet = set()
+			for point in anyPoints:
+				anySet |= self.byPoint.get(point, set())
+			indexSet &= anySet
+		return [Entry(index, _nodeName(self.handles[index]), *self.tags[index])
+			for index in sorted(indexSet) if self.handles[index].isValid()]
+
+	def delete(self, role=None, ctrlNum=None, points=(), anyPoints=()):
+		'''Delete the nodes matching the tags with one delete. Nodes whose parent is also
+		deleted are left to the parent. Returns the number of entries removed.'''
+		return self.deleteEntries(self.select(role, ctrlNum, points, anyPoints))
+
+	def deleteEntries(self, entries):
+		'''Delete the nodes of a list of entries, e.g. from several select() calls, with one
+		delete. Returns the number of entries removed.'''
+		if not entries:
+			return 0
+		longNames = set(mc.ls([entry.node for entry in entries], long=True) or [])
+		topNodes = []
+		for longName in longNames:
+			parents = longName.split('|')
+			if not [i for i in range(2, len(parents)) if '|'.join(parents[:i]) in longNames]:
+				topNodes.append(longName)
+		mc.delete(topNodes)
+
+		# The deleted descendants of the top nodes are gone as well
+		self.load()
+		self.save()
+		return len(entries)
+
+
+def registerMuscle(muscleName, numCtrls, data):
+	'''Tag the nodes of a pose system that was built before the registry existed. data is
+	the axis point lists of the driver. Handles both the original pose group layout and the
+	per control layout of poseReorganization3.py. Returns the registry.'''
+	registry = getRegistry(muscleName, create=True)
+	registered = set(registry.nodes.values())
+
+	candidates = [('%s_pose_grp' % muscleName, 'poseGrp', 0, '')]
+
+	# Pose cells at every axis level: ['x0', 'x0_y0', 'x0_y0_w0', ...]
+	cells = [cell for numAxes in range(1, len(data) + 1) for cell in cellNames(data[:numAxes])]
+	poses = cellNames(data)
+
+	for cell in cells:
+		candidates.append(('%s_%s_grp' % (muscleName, cell), 'cellGrp', 0, cell))
+
+	for cNum in range(1, numCtrls + 1):
+		control = 'iControlMidMus_%s%s1' % (muscleName, cNum)
+		candidates.append(('%s_pointConstraint1' % control, 'pointConstraint', cNum, ''))
+		candidates.append(('%s_crossSectionREST_blendShape' % control, 'blendShape', cNum, ''))
+		candidates.append(('%s_control%s_pose_grp' % (muscleName, cNum), 'ctrlPoseGrp', cNum, ''))
+		for cell in cells:
+			candidates.append(('%s_control%s_%s_pose_grp' % (muscleName, cNum, cell), 'cellGrp',
+				cNum, cell))
+		for pose in poses:
+			candidates.append(('%s_%s_control%s_grp' % (muscleName, pose, cNum), 'ctrlPoseGrp',
+				cNum, pose))
+			candidates.append(('%s_control%s_%s_target' % (muscleName, cNum, pose), 'ctrlTarget',
+				cNum, pose))
+			candidates.append(('%s_crossSection%s_%s_target' % (muscleName, cNum, pose),
+				'crossTarget', cNum, pose))
+
+	existing = set(existingNames([candidate[0] for candidate in candidates]))
+	for node, role, cNum, pose in candidates:
+		if node in existing and node not in registered:
+			registry.tag(node, role, cNum, pose)
+	registry.save()
+	return registry
+
+
+_registries = {}
+
+def lookupName(muscleName, role, ctrlNum, pose, name):
+	'''Return the current name of the node tagged (role, ctrlNum, pose) in the registry of
+	the muscle, so renamed nodes are found. Returns name if the muscle has no registry or
+	the node is not tagged.'''
+	registry = getRegistry(muscleName)
+	node = registry.lookup(role, ctrlNum, pose) if registry else None
+	return node or name
+
+
+def getRegistry(muscleName, create=False):
+	'''Return the loaded registry of the muscle. If the muscle has no registry node, creates
+	one when create is set and returns None otherwise. The registry is loaded once and
+	shared, so tags and deletes made through it are seen by every caller.'''
+	registry = _registries.get(muscleName)
+	if registry is not None and registry.handle.isValid():
+		return registry
+	if not create and not mc.objExists('%s_nefer_registry' % muscleName):
+		return None
+	registry = NeferRegistry(muscleName)
+	_registries[muscleName] = registry
+	return registry
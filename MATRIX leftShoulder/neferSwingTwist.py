@@ -0,0 +1,61 @@
+# neferSwingTwist.py
+# Copyright (c) 2014 Skin+Bones Modeling and Rigging Company. All rights reserved.
+
+'''
+Swing-twist decomposition of a joint rotation in pure Python. Splits the rotation of the
+humerus from its rest pose into
+
+	swing	the rotation that takes the arm axis to its new direction, given as
+			latitude (angle from the rest direction) and longitude (direction of the swing)
+	twist	the rotation about the arm axis that is left
+
+Unlike Euler longitude/latitude samples, the twist does not depend on the longitude, and
+at latitude 0 every longitude is the same pose (see PolarPoseGrid in neferPoseGrid.py).
+
+	longitude, latitude, twist = swingTwist((x, y, z, w))
+'''
+
+import math
+
+
+def quatMultiply(a, b):
+	ax, ay, az, aw = a
+	bx, by, bz, bw = b
+	return (
+		aw * bx + ax * bw + ay * bz - az * by,
+		aw * by - ax * bz + ay * bw + az * bx,
+		aw * bz + ax * by - ay * bx + az * bw,
+		aw * bw - ax * bx - ay * by - az * bz)
+
+
+def quatRotate(q, v):
+	'Rotate the vector v by the unit quaternion q.'
+	x, y, z, w = quatMultiply(quatMultiply(q, (v[0], v[1], v[2], 0.0)), (-q[0], -q[1], -q[2], q[3]))
+	return (x, y, z)
+
+
+def swingTwist(q, twistAxis=0, refAxis=1):
+	'''Return (longitude, latitude, twist) in degrees for the unit quaternion q (x, y, z, w).
+	twistAxis is the index of the arm axis (0 for X). Longitude is measured from refAxis
+	towards the third axis. Twist is in [-180, 180].'''
+	if q[3] < 0.0:
+		q = (-q[0], -q[1], -q[2], -q[3])
+	# w >= 0, so the half angle is in [-90, 90]
+	twist = math.degrees(2.0 * math.atan2(q[twistAxis], q[3]))
+
+	axis = [0.0, 0.0, 0.0]
+	axis[twistAxis] = 1.0
+	direction = quatRotate(q, axis)
+	latitude = math.degrees(math.acos(max(-1.0, min(1.0, direction[twistAxis]))))
+	thirdAxis = 3 - twistAxis - refAxis
+	longitude = math.degrees(math.atan2(direction[thirdAxis], direction[refAxis]))
+	if latitude < 1e-6:
+		longitude = 0.0
+	return longitude, latitude, twist
+
+
+def wrapAngle(value, lo, hi):
+	'''Wrap the angle value (degrees) into the 360 degree range around [lo, hi] that splits
+	the gap outside [lo, hi] in the middle, so it clamps to the nearer end of the range.'''
+	start = lo - (360.0 - (hi - lo)) / 2.0
+	return start + (value - start) % 360.0